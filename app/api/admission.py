@@ -0,0 +1,295 @@
+# Controle de admissão: limites de concorrência por rota, fila com prazo e cotas por cliente
+import asyncio
+import heapq
+import itertools
+import math
+import re
+import time
+from collections import OrderedDict
+from fastapi.responses import JSONResponse
+
+
+class Rejected(Exception):
+    """
+    Exceção usada quando uma requisição não é admitida.
+
+    Atributos:
+        - status_code (int): 503 (sobrecarga) ou 429 (cota do cliente esgotada).
+        - retry_after (int): Segundos sugeridos para o cliente tentar novamente.
+        - detail (str): Mensagem de erro.
+    """
+
+    def __init__(self, status_code: int, retry_after: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.detail = detail
+
+
+class RouteClass:
+    """
+    Classe de rotas que compartilham o mesmo limite de concorrência e a mesma fila.
+
+    Atributos:
+        - name (str): Nome da classe (ex.: 'read', 'bulk').
+        - max_concurrent (int): Requisições executando ao mesmo tempo.
+        - max_queue (int): Requisições aguardando na fila; acima disso há rejeição imediata.
+        - queue_timeout (float): Tempo máximo, em segundos, de espera na fila.
+        - priority (int): Prioridade na disputa pelo limite global (menor é atendido antes).
+        - cost (int): Fichas consumidas da cota do cliente por requisição.
+    """
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float,
+                 priority: int = 0, cost: int = 1):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.priority = priority
+        self.cost = cost
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.rejected_quota = 0
+        # Média móvel do tempo de atendimento, usada no cálculo do Retry-After
+        self.avg_service_time = 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "rejected_quota": self.rejected_quota,
+            "avg_service_time": round(self.avg_service_time, 6),
+        }
+
+
+class TokenBucket:
+    """
+    Balde de fichas: até 'burst' fichas, repostas à taxa de 'rate' fichas por segundo.
+    """
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1) -> float:
+        """
+        Consome fichas do balde.
+
+        Args:
+            cost (float): Quantidade de fichas.
+
+        Returns:
+            float: 0 se as fichas foram consumidas, ou os segundos até haver fichas suficientes.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Decide se uma requisição executa agora, espera na fila ou é rejeitada.
+
+    Cada classe de rota tem o seu limite de concorrência e a sua fila limitada; o
+    limite global (em geral, o tamanho do pool de threads) é disputado pelas filas
+    por prioridade, para que leituras baratas passem à frente de operações em lote.
+    """
+
+    def __init__(self, classes: list, rules: list, global_limit: int,
+                 client_rate: float = 0, client_burst: float = 0, max_clients: int = 10_000):
+        """
+        Args:
+            classes (list): Classes de rota (RouteClass).
+            rules (list): Tuplas (métodos, regex do caminho, nome da classe ou None para isentar),
+                avaliadas em ordem; a primeira que casar define a classe.
+            global_limit (int): Total de requisições executando ao mesmo tempo.
+            client_rate (float): Fichas por segundo de cada cliente (0 desativa as cotas).
+            client_burst (float): Tamanho do balde de fichas de cada cliente.
+            max_clients (int): Quantidade de baldes mantidos em memória.
+        """
+        self.classes = {route_class.name: route_class for route_class in classes}
+        self.rules = [(set(methods), re.compile(pattern), name) for methods, pattern, name in rules]
+        self.global_limit = global_limit
+        self.global_in_flight = 0
+        self.client_rate = client_rate
+        self.client_burst = client_burst or client_rate
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._waiters = []
+        self._sequence = itertools.count()
+
+    def classify(self, method: str, path: str):
+        """
+        Retorna a classe de rota de uma requisição, ou None se ela for isenta.
+        """
+        for methods, pattern, name in self.rules:
+            if method in methods and pattern.fullmatch(path):
+                return self.classes[name] if name else None
+        return None
+
+    def check_quota(self, client: str, route_class: RouteClass):
+        """
+        Consome a cota do cliente, rejeitando com 429 quando ela estiver esgotada.
+        """
+        if not self.client_rate:
+            return
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.client_rate, self.client_burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+
+        wait = bucket.take(route_class.cost)
+        if wait:
+            route_class.rejected_quota += 1
+            raise Rejected(429, math.ceil(wait), "Limite de requisições excedido. Tente novamente mais tarde.")
+
+    def _can_run(self, route_class: RouteClass) -> bool:
+        return (self.global_in_flight < self.global_limit
+                and route_class.in_flight < route_class.max_concurrent)
+
+    def _start(self, route_class: RouteClass):
+        self.global_in_flight += 1
+        route_class.in_flight += 1
+        route_class.admitted += 1
+
+    def _retry_after(self, route_class: RouteClass) -> int:
+        estimate = route_class.avg_service_time * (route_class.waiting + 1) / route_class.max_concurrent
+        return max(1, math.ceil(estimate))
+
+    async def acquire(self, route_class: RouteClass):
+        """
+        Aguarda uma vaga para a requisição, respeitando a fila e o prazo da classe.
+
+        Raises:
+            Rejected: Se a fila estiver cheia ou o prazo de espera expirar.
+        """
+        if self._can_run(route_class):
+            self._start(route_class)
+            return
+
+        if route_class.waiting >= route_class.max_queue:
+            route_class.rejected_queue_full += 1
+            raise Rejected(503, self._retry_after(route_class), "Servidor sobrecarregado. Tente novamente mais tarde.")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = [route_class.priority, next(self._sequence), route_class, future]
+        heapq.heappush(self._waiters, entry)
+        route_class.waiting += 1
+        try:
+            await asyncio.wait({future}, timeout=route_class.queue_timeout)
+        except BaseException:
+            # Cliente desconectado durante a espera: devolve a vaga, se já concedida
+            if future.done():
+                self.release(route_class, 0.0)
+            else:
+                future.cancel()
+                route_class.waiting -= 1
+            raise
+
+        if not future.done():
+            future.cancel()
+            route_class.waiting -= 1
+            route_class.rejected_timeout += 1
+            raise Rejected(503, self._retry_after(route_class), "Tempo de espera esgotado. Tente novamente mais tarde.")
+
+    def release(self, route_class: RouteClass, service_time: float):
+        """
+        Libera a vaga de uma requisição concluída e admite as próximas da fila.
+        """
+        self.global_in_flight -= 1
+        route_class.in_flight -= 1
+        if service_time:
+            route_class.avg_service_time = 0.9 * route_class.avg_service_time + 0.1 * service_time
+        self._dispatch()
+
+    def _dispatch(self):
+        # Percorre a fila por prioridade; entradas de classes sem vaga voltam para a fila
+        blocked = []
+        while self._waiters and self.global_in_flight < self.global_limit:
+            entry = heapq.heappop(self._waiters)
+            route_class, future = entry[2], entry[3]
+            if future.done():
+                continue
+            if route_class.in_flight >= route_class.max_concurrent:
+                blocked.append(entry)
+                continue
+            route_class.waiting -= 1
+            self._start(route_class)
+            future.set_result(True)
+        for entry in blocked:
+            heapq.heappush(self._waiters, entry)
+
+    def snapshot(self) -> dict:
+        """
+        Métricas atuais de concorrência, profundidade das filas e rejeições.
+        """
+        return {
+            "global_in_flight": self.global_in_flight,
+            "global_limit": self.global_limit,
+            "queue_depth": sum(route_class.waiting for route_class in self.classes.values()),
+            "classes": {name: route_class.snapshot() for name, route_class in self.classes.items()},
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Middleware ASGI que aplica o AdmissionController antes das rotas.
+
+    É um middleware ASGI puro (e não BaseHTTPMiddleware) para não acumular em
+    memória as respostas em streaming.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        route_class = self.controller.classify(scope["method"], scope["path"])
+        if route_class is None:
+            return await self.app(scope, receive, send)
+
+        try:
+            self.controller.check_quota(self._client_key(scope), route_class)
+            await self.controller.acquire(route_class)
+        except Rejected as e:
+            response = JSONResponse(
+                status_code=e.status_code,
+                content={"detalhe": e.detail},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+            return await response(scope, receive, send)
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class, time.monotonic() - started)
+
+    @staticmethod
+    def _client_key(scope) -> str:
+        # Clientes são identificados pela chave de API, se enviada, ou pelo IP
+        for name, value in scope.get("headers", []):
+            if name == b"x-api-key":
+                return "key:" + value.decode("latin-1")
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "desconhecido")
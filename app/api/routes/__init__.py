@@ -1,6 +1,10 @@
 from fastapi import APIRouter
 from .cotas_routes import router as cotas_router
+from .jobs_routes import router as jobs_router
+from .portfolios_routes import router as portfolios_router
 
 
 router = APIRouter()
 router.include_router(cotas_router, prefix="/cotas", tags=["Cotas"])
+router.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
+router.include_router(portfolios_router, prefix="/portfolios", tags=["Carteiras"])
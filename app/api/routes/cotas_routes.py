@@ -1,15 +1,42 @@
 # Importação de módulos necessários
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import time
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.models.cota_model import Cota
-from app.schemas.schemas import CotaCreate, CotaResponse, CotaProfitResponse
+from app.schemas.schemas import (
+    CotaCreate, CotaResponse, CotaProfitResponse, CotaSummaryResponse,
+    CotaChangeResponse, CotaChangesResponse
+)
 from app.crud import crud
-from app.database.database import get_db
-from typing import List
+from app.database.database import get_db, SessionLocal
+from typing import List, Literal, Optional
 
 # Criando nova APIRouter
 router = APIRouter()
 
+# Intervalo (segundos) entre consultas ao feed durante long-polling e SSE
+CHANGES_POLL_INTERVAL = 0.5
+# Intervalo (segundos) sem eventos após o qual o SSE envia um keep-alive
+CHANGES_KEEPALIVE_INTERVAL = 15
+
+
+def _read_changes(since: int, limit: int, shard: Optional[str]):
+    """
+    Lê os eventos do feed em uma sessão própria (executado fora do event loop).
+
+    Returns:
+        list: Eventos no formato Pydantic.
+    """
+    db = SessionLocal()
+    try:
+        changes = crud.list_changes(db, since=since, limit=limit, shard=shard)
+        return [CotaChangeResponse.model_validate(change) for change in changes]
+    finally:
+        db.close()
+
 
 # Adicionando endpoint para calcular o lucro de uma cota (cota de investimento)
 @router.get("/cotas/{cota_id}/profit", response_model=CotaProfitResponse)
@@ -66,6 +93,86 @@ def create_cota_endpoint(cota: CotaCreate, db: Session = Depends(get_db)):
     return crud.create_cota(db, cota)
 
 
+# Adicionando endpoint para consultar os totais de todas as cotas (cotas de investimento)
+@router.get("/summary", response_model=CotaSummaryResponse)
+def get_cotas_summary(db: Session = Depends(get_db)):
+    """
+    Retorna a quantidade de cotas e os totais investidos, brutos e líquidos.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        CotaSummaryResponse: Totais consolidados das cotas.
+    """
+    return crud.summarize_cotas(db)
+
+
+# Adicionando endpoint para acompanhar as alterações das cotas (long-polling ou SSE)
+@router.get("/changes", response_model=CotaChangesResponse)
+async def list_changes_endpoint(
+    request: Request,
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, gt=0, le=1000),
+    wait: float = Query(0, ge=0, le=60),
+    shard: Optional[str] = None,
+    last_event_id: Optional[int] = Header(None),
+):
+    """
+    Lista as alterações de cotas posteriores a um número de sequência.
+
+    Com 'wait', a resposta aguarda até 'wait' segundos por novos eventos (long-polling).
+    Com o cabeçalho 'Accept: text/event-stream', os eventos são enviados como
+    Server-Sent Events; nesse caso 'wait' limita a duração do stream (0 = sem limite).
+
+    Args:
+        request (Request): Requisição atual.
+        since (int): Último número de sequência já processado.
+        limit (int): Número máximo de eventos por resposta.
+        wait (float): Tempo máximo de espera, em segundos.
+        shard (str): Shard consultado no modo particionado.
+        last_event_id (int): Cabeçalho 'Last-Event-ID' enviado na reconexão do SSE.
+
+    Returns:
+        CotaChangesResponse: Eventos e a sequência para a próxima consulta.
+    """
+    streaming = "text/event-stream" in request.headers.get("accept", "")
+    if streaming and last_event_id is not None:
+        since = last_event_id
+
+    deadline = time.monotonic() + wait
+    changes = await run_in_threadpool(_read_changes, since, limit, shard)
+
+    if streaming:
+        async def event_stream():
+            cursor = since
+            pending = changes
+            idle_since = time.monotonic()
+            while True:
+                for change in pending:
+                    cursor = change.seq
+                    yield f"id: {change.seq}\nevent: {change.operation}\ndata: {change.model_dump_json()}\n\n"
+                if pending:
+                    idle_since = time.monotonic()
+                elif time.monotonic() - idle_since >= CHANGES_KEEPALIVE_INTERVAL:
+                    idle_since = time.monotonic()
+                    yield ": keep-alive\n\n"
+                if (wait and time.monotonic() >= deadline) or await request.is_disconnected():
+                    return
+                if len(pending) < limit:
+                    await asyncio.sleep(CHANGES_POLL_INTERVAL)
+                pending = await run_in_threadpool(_read_changes, cursor, limit, shard)
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    # Long-polling: aguarda novos eventos até o prazo
+    while not changes and time.monotonic() < deadline:
+        await asyncio.sleep(CHANGES_POLL_INTERVAL)
+        changes = await run_in_threadpool(_read_changes, since, limit, shard)
+
+    return {"changes": changes, "last_seq": changes[-1].seq if changes else since}
+
+
 # Adicionando endpoint para buscar uma cota (cota de investimento) específica
 @router.get("/{cota_id}", response_model=CotaResponse)
 def get_cota(cota_id: int, db: Session = Depends(get_db)):
@@ -87,19 +194,50 @@ def get_cota(cota_id: int, db: Session = Depends(get_db)):
 
 # Adicionando endpoint para listar todas as cotas (cotas de investimento) com paginação
 @router.get("/", response_model=List[CotaResponse])
-def list_cotas_endpoint(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
+def list_cotas_endpoint(
+    response: Response,
+    skip: int = 0,
+    limit: int = 10,
+    name: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    duration_months: Optional[int] = None,
+    portfolio_id: Optional[int] = None,
+    count: Optional[Literal["exact", "estimated"]] = None,
+    db: Session = Depends(get_db),
+):
     """
-    Lista todas as cotas com suporte a paginação.
+    Lista todas as cotas com suporte a paginação e filtros.
+
+    Com 'count', o total de cotas da listagem é informado no cabeçalho 'X-Total-Count'.
+    Sem filtros, o total vem de um contador mantido a cada criação e exclusão; com
+    filtros, 'exact' conta as cotas filtradas e 'estimated' estima o total por amostragem.
 
     Args:
+        response (Response): Resposta, usada para adicionar o cabeçalho do total.
         skip (int): Número de registros a pular.
         limit (int): Número máximo de registros a retornar.
+        name (str): Prefixo do nome da cota.
+        min_amount (float): Valor investido mínimo.
+        max_amount (float): Valor investido máximo.
+        duration_months (int): Duração em meses.
+        portfolio_id (int): ID da carteira.
+        count (str): Modo da contagem total ('exact' ou 'estimated').
         db (Session): Sessão do banco de dados.
 
     Returns:
         list: Lista de cotas.
     """
-    cotas = crud.list_cotas(db, skip=skip, limit=limit)
+    filters = {
+        "name": name,
+        "min_amount": min_amount,
+        "max_amount": max_amount,
+        "duration_months": duration_months,
+        "portfolio_id": portfolio_id,
+    }
+    cotas = crud.list_cotas(db, skip=skip, limit=limit, filters=filters)
+    if count is not None:
+        response.headers["X-Total-Count"] = str(crud.count_cotas(db, mode=count, filters=filters))
     return [CotaResponse.from_orm(cota) for cota in cotas]
 
 
@@ -0,0 +1,86 @@
+# Importação de módulos necessários
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.schemas.schemas import JobCreate, JobResponse, JobResultResponse
+from app.crud import crud
+from app.database.database import get_db
+from app.jobs import jobs
+
+# Criando nova APIRouter
+router = APIRouter()
+
+
+# Adicionando endpoint para criar um job em segundo plano
+@router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_job_endpoint(job: JobCreate, db: Session = Depends(get_db)):
+    """
+    Cria um job (reavaliação, simulação ou exportação) e agenda a sua execução.
+
+    Args:
+        job (JobCreate): Tipo e parâmetros do job.
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        JobResponse: Dados do job criado, incluindo o ID para consulta.
+    """
+    db_job = crud.create_job(db, job, max_pending=jobs.JOBS_MAX_PENDING)
+    jobs.submit_job(db_job.id)
+    return db_job
+
+
+# Adicionando endpoint para consultar o status e o progresso de um job
+@router.get("/{job_id}", response_model=JobResponse)
+def get_job_endpoint(job_id: int, db: Session = Depends(get_db)):
+    """
+    Busca o status e o progresso de um job.
+
+    Args:
+        job_id (int): ID do job.
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        JobResponse: Dados do job encontrado.
+    """
+    db_job = crud.get_job(db, job_id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    return db_job
+
+
+# Adicionando endpoint para buscar o resultado de um job
+@router.get("/{job_id}/result", response_model=JobResultResponse)
+def get_job_result_endpoint(job_id: int, db: Session = Depends(get_db)):
+    """
+    Busca o resultado de um job concluído.
+
+    Args:
+        job_id (int): ID do job.
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        JobResultResponse: Resultado do job.
+    """
+    db_job = crud.get_job(db, job_id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+    if db_job.status == "expired":
+        raise HTTPException(status_code=410, detail="O resultado do job expirou.")
+    if db_job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"O job não foi concluído (status: {db_job.status}).")
+    return db_job
+
+
+# Adicionando endpoint para cancelar um job
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+def cancel_job_endpoint(job_id: int, db: Session = Depends(get_db)):
+    """
+    Cancela um job pendente ou solicita a interrupção de um job em execução.
+
+    Args:
+        job_id (int): ID do job.
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        JobResponse: Dados do job atualizado.
+    """
+    return crud.cancel_job(db, job_id)
@@ -0,0 +1,82 @@
+# Importação de módulos necessários
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from app.schemas.schemas import (
+    PortfolioCreate, PortfolioResponse, PortfolioSummaryResponse, PortfolioRebuildResponse
+)
+from app.crud import crud
+from app.database.database import get_db
+from typing import Optional
+
+# Criando nova APIRouter
+router = APIRouter()
+
+
+# Adicionando endpoint para criar uma carteira de cotas
+@router.post("/", response_model=PortfolioResponse, status_code=status.HTTP_201_CREATED)
+def create_portfolio_endpoint(portfolio: PortfolioCreate, db: Session = Depends(get_db)):
+    """
+    Cria uma nova carteira de cotas.
+
+    Args:
+        portfolio (PortfolioCreate): Dados da carteira a ser criada.
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        PortfolioResponse: Dados da carteira criada.
+    """
+    return crud.create_portfolio(db, portfolio)
+
+
+# Adicionando endpoint para recalcular os totais das carteiras a partir das cotas
+@router.post("/rebuild", response_model=PortfolioRebuildResponse)
+def rebuild_portfolios_endpoint(portfolio_id: Optional[int] = None, db: Session = Depends(get_db)):
+    """
+    Recalcula os totais acumulados das carteiras e corrige as divergências.
+
+    Args:
+        portfolio_id (int): Carteira a recalcular (padrão: todas).
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        PortfolioRebuildResponse: IDs das carteiras corrigidas.
+    """
+    return {"corrected": crud.rebuild_portfolio_rollups(db, portfolio_id)}
+
+
+# Adicionando endpoint para buscar uma carteira específica
+@router.get("/{portfolio_id}", response_model=PortfolioResponse)
+def get_portfolio_endpoint(portfolio_id: int, db: Session = Depends(get_db)):
+    """
+    Busca uma carteira específica pelo ID.
+
+    Args:
+        portfolio_id (int): ID da carteira.
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        PortfolioResponse: Dados da carteira encontrada.
+    """
+    db_portfolio = crud.get_portfolio(db, portfolio_id)
+    if db_portfolio is None:
+        raise HTTPException(status_code=404, detail="Carteira não encontrada.")
+    return db_portfolio
+
+
+# Adicionando endpoint para consultar os totais de uma carteira
+@router.get("/{portfolio_id}/summary", response_model=PortfolioSummaryResponse)
+def get_portfolio_summary_endpoint(portfolio_id: int, db: Session = Depends(get_db)):
+    """
+    Retorna os totais de uma carteira, lidos dos valores acumulados (sem carregar as cotas).
+
+    Args:
+        portfolio_id (int): ID da carteira.
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        PortfolioSummaryResponse: Totais, taxa média ponderada e distribuição de vencimentos.
+    """
+    summary = crud.summarize_portfolio(db, portfolio_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Carteira não encontrada.")
+    return summary
@@ -0,0 +1,67 @@
+# Benchmark da reavaliação em lote: caminho em float (anterior) x ponto fixo (app.money)
+import argparse
+import random
+import time
+from array import array
+from decimal import ROUND_DOWN, ROUND_HALF_EVEN, ROUND_HALF_UP
+from app import money
+
+
+def float_cota_values(amount: float, interest_rate: float, duration: int, tax: float):
+    """
+    Cálculo em float usado antes do ponto fixo (mantido aqui apenas para comparação).
+    """
+    if amount <= 0 or interest_rate <= 0 or duration <= 0 or tax < 0:
+        raise ValueError("Todos os valores devem ser positivos e a taxa não pode ser negativa.")
+
+    profitability = amount * (interest_rate / 100) * duration
+    gross_value = amount + profitability
+    tax_value = profitability * tax
+    net_value = gross_value - tax_value
+
+    return gross_value, net_value, profitability
+
+
+def _best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(size: int, repeat: int):
+    """
+    Mede o tempo de reavaliar 'size' cotas nos dois caminhos e imprime a razão.
+
+    Args:
+        size (int): Quantidade de cotas do lote.
+        repeat (int): Quantidade de repetições (é usado o melhor tempo).
+    """
+    rng = random.Random(42)
+    amounts = array("q", (rng.randint(100, 10 ** 9) for _ in range(size)))
+    rates = array("q", (rng.randint(1, 500) for _ in range(size)))
+    durations = array("q", (rng.randint(1, 120) for _ in range(size)))
+    taxes = array("q", [money.DEFAULT_TAX_BP]) * size
+
+    float_rows = [
+        (money.from_cents(a), money.bp_to_percent(r), d, money.bp_to_fraction(t))
+        for a, r, d, t in zip(amounts, rates, durations, taxes)
+    ]
+    float_time = _best_of(repeat, lambda: [float_cota_values(*row) for row in float_rows])
+    print(f"float            : {size / float_time:12,.0f} cotas/s")
+
+    for rounding in (ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_DOWN):
+        fixed_time = _best_of(
+            repeat, lambda: money.calculate_batch(amounts, rates, durations, taxes, rounding)
+        )
+        print(f"{rounding:<17}: {size / fixed_time:12,.0f} cotas/s  ({fixed_time / float_time:.2f}x o tempo do float)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara a reavaliação em lote em float e em ponto fixo.")
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.size, args.repeat)
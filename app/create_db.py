@@ -1,9 +1,34 @@
 # Importando banco de dados e criando as tabelas
-from app.database.database import engine, Base
-# Importando o modelo para criar as tabelas no banco de dados
-from app.models.cota_model import Cota
+from app.database.database import engine, Base, shard_router
+from app.database.migrations import (
+    add_cota_portfolio_column, add_job_heartbeat_column, migrate_cotas_to_fixed_point
+)
+from app.database.rebalance import redistribute
+from app.crud import crud
+# Importando os modelos para criar as tabelas no banco de dados
+from app.models import Cota
 
 # Criando as tabelas no banco de dados
 if __name__ == "__main__":
-    Base.metadata.create_all(bind=engine)
+    if shard_router is not None:
+        shard_router.create_all(Base.metadata, id_table=Cota.__table__)
+        for shard_engine in shard_router.shards.values():
+            migrate_cotas_to_fixed_point(shard_engine)
+            add_cota_portfolio_column(shard_engine)
+            add_job_heartbeat_column(shard_engine)
+        # Ao migrar de um banco único, as cotas vão para o shard dono do seu bucket
+        moved = redistribute(shard_router, Cota.__table__, fence=crud.record_moves)
+        if moved:
+            db = shard_router.session()
+            try:
+                crud.reconcile_cota_counter(db)
+                crud.rebuild_portfolio_rollups(db)
+            finally:
+                db.close()
+            print(f"{moved} cotas movidas para o shard dono do seu bucket.")
+    else:
+        Base.metadata.create_all(bind=engine)
+        migrate_cotas_to_fixed_point(engine)
+        add_cota_portfolio_column(engine)
+        add_job_heartbeat_column(engine)
     print("Banco de dados atualizado com sucesso!")
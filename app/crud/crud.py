@@ -1,10 +1,21 @@
 # Importando módulos necessários
-from sqlalchemy.orm import Session
-from datetime import datetime
+from sqlalchemy import and_, case, func, insert, select, update
+from sqlalchemy.orm import Session, aliased
+from datetime import datetime, timedelta, timezone
+from app.database.sharding import get_router
 from app.models.cota_model import Cota
-from app.schemas.schemas import CotaCreate, CotaResponse
+from app.models.change_model import CotaChange
+from app.models.counter_model import RowCounter
+from app.models.portfolio_model import (
+    MATURITY_BUCKETS, ROLLUP_COLUMNS, Portfolio, PortfolioRollup, maturity_column
+)
+from app.models.job_model import Job
+from app.schemas.schemas import CotaCreate, CotaResponse, JobCreate, PortfolioCreate
 from fastapi import HTTPException
-from decimal import Decimal
+from app import money
+
+# Quantidade de cotas (por shard) lidas para estimar a contagem de uma listagem filtrada
+COUNT_SAMPLE_SIZE = 1000
 
 
 # Função para calcular rentabilidade da cota de investimento, antes de salvar
@@ -12,26 +23,43 @@ def calculate_cota_values(amount: float, interest_rate: float, duration: int, ta
     """
     Calcula os valores bruto, líquido e a rentabilidade de uma cota.
 
+    Os valores são convertidos para centavos e pontos-base e calculados com
+    aritmética inteira exata (ver app.money).
+
     Args:
         amount (float): Valor inicial da cota.
-        interest_rate (float): Taxa de juros anual.
+        interest_rate (float): Taxa de juros mensal (%).
         duration (int): Duração em meses.
         tax (float): Taxa de imposto.
 
     Returns:
         tuple: Valores bruto, líquido e rentabilidade da cota.
     """
-    # Verifica se os valores são válidos
-    if amount <= 0 or interest_rate <= 0 or duration <= 0 or tax < 0:
-        raise ValueError("Todos os valores devem ser positivos e a taxa não pode ser negativa.")
+    gross_value, net_value, profitability = money.calculate_cota_values_cents(
+        money.to_cents(amount), money.percent_to_bp(interest_rate), duration, money.fraction_to_bp(tax)
+    )
+    return money.from_cents(gross_value), money.from_cents(net_value), money.from_cents(profitability)
 
-    # Cálculo de rendimento com juros simples
-    profitability = amount * (interest_rate / 100) * duration
-    gross_value = amount + profitability
-    tax_value = profitability * tax
-    net_value = gross_value - tax_value
 
-    return gross_value, net_value, profitability
+# Função para atualizar os valores calculados de uma cota a partir das colunas em centavos
+def apply_cota_values(db_cota: Cota):
+    """
+    Recalcula e atribui os valores bruto, líquido e a rentabilidade de uma cota.
+
+    Args:
+        db_cota (Cota): Cota com valor, taxa, prazo e imposto preenchidos.
+
+    Returns:
+        Cota: A própria cota, com os valores calculados.
+    """
+    (
+        db_cota.gross_value_cents,
+        db_cota.net_value_cents,
+        db_cota.profitability_cents,
+    ) = money.calculate_cota_values_cents(
+        db_cota.amount_cents, db_cota.interest_rate_bp, db_cota.duration_months, db_cota.tax_bp
+    )
+    return db_cota
 
 
 # Cria uma cota (cota de investimento)
@@ -46,20 +74,19 @@ def create_cota(db: Session, cota: CotaCreate):
     Returns:
         Cota: Objeto da cota criada.
     """
+    _check_portfolio(db, cota.portfolio_id)
+    db_cota = Cota(**cota.model_dump(), tax_bp=money.DEFAULT_TAX_BP)
     try:
-        gross_value, net_value, profitability = calculate_cota_values(
-            cota.amount, cota.interest_rate, cota.duration_months, 0.15
-        )
+        apply_cota_values(db_cota)  # Salva os valores calculados e a rentabilidade
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    db_cota = Cota(
-        **cota.model_dump(),
-        gross_value=gross_value,
-        net_value=net_value,
-        profitability=profitability  # Salva a rentabilidade
-    )
     db.add(db_cota)
+    # Gera o ID da cota para registrar o evento, o contador e a carteira na mesma transação
+    db.flush()
+    record_change(db, db_cota, "create")
+    adjust_cota_counter(db, db_cota, 1)
+    update_portfolio_rollups(db, db_cota, None, portfolio_contribution(db_cota))
     db.commit()
     db.refresh(db_cota)
     return db_cota
@@ -80,8 +107,36 @@ def get_cota(db: Session, cota_id: int):
     return db.query(Cota).filter(Cota.id == cota_id).first()
 
 
+# Monta os critérios de filtro da listagem de cotas (cotas de investimentos)
+def cota_filters(entity, filters: dict = None) -> list:
+    """
+    Converte os filtros da listagem em critérios do SQLAlchemy.
+
+    Args:
+        entity: Modelo Cota ou um alias dele (ex.: uma amostra da tabela).
+        filters (dict): Filtros informados: 'name' (prefixo do nome), 'min_amount',
+            'max_amount', 'duration_months' e 'portfolio_id'.
+
+    Returns:
+        list: Critérios a serem combinados com AND.
+    """
+    filters = filters or {}
+    criteria = []
+    if filters.get("name"):
+        criteria.append(entity.name.startswith(filters["name"], autoescape=True))
+    if filters.get("min_amount") is not None:
+        criteria.append(entity.amount_cents >= money.to_cents(filters["min_amount"]))
+    if filters.get("max_amount") is not None:
+        criteria.append(entity.amount_cents <= money.to_cents(filters["max_amount"]))
+    if filters.get("duration_months") is not None:
+        criteria.append(entity.duration_months == filters["duration_months"])
+    if filters.get("portfolio_id") is not None:
+        criteria.append(entity.portfolio_id == filters["portfolio_id"])
+    return criteria
+
+
 # Lista todas as cotas (cotas de investimentos) com paginação
-def list_cotas(db: Session, skip: int = 0, limit: int = 100):
+def list_cotas(db: Session, skip: int = 0, limit: int = 100, filters: dict = None):
     """
     Lista todas as cotas com suporte a paginação.
 
@@ -89,14 +144,219 @@ def list_cotas(db: Session, skip: int = 0, limit: int = 100):
         db (Session): Sessão do banco de dados.
         skip (int): Número de registros a pular.
         limit (int): Número máximo de registros a retornar.
+        filters (dict): Filtros opcionais (ver cota_filters).
 
     Returns:
         list: Lista de cotas no formato Pydantic.
     """
-    cotas = db.query(Cota).offset(skip).limit(limit).all()
+    criteria = cota_filters(Cota, filters)
+    # No modo particionado, consulta todos os shards em paralelo e mescla pelo ID
+    router = get_router(db)
+    if router is not None:
+        cotas = router.list_ordered(Cota, skip=skip, limit=limit, where=criteria)
+    else:
+        cotas = db.query(Cota).filter(*criteria).order_by(Cota.id).offset(skip).limit(limit).all()
     return [CotaResponse.from_orm(cota) for cota in cotas]
 
 
+# Executa uma consulta de agregação em cada shard (ou no banco único)
+def _aggregate(db: Session, stmt) -> list:
+    router = get_router(db)
+    return router.aggregate(stmt) if router is not None else [db.execute(stmt).one()]
+
+
+# Conta as cotas (cotas de investimentos), com ou sem filtros
+def count_cotas(db: Session, mode: str = "exact", filters: dict = None) -> int:
+    """
+    Retorna o total de cotas de uma listagem.
+
+    Sem filtros, o total vem do contador mantido em 'row_counters' e não percorre a
+    tabela. Com filtros, o modo 'exact' executa um COUNT com os filtros e o modo
+    'estimated' aplica ao total do contador a proporção de cotas que atendem aos
+    filtros em uma amostra de até COUNT_SAMPLE_SIZE IDs espaçados igualmente entre
+    o menor e o maior ID, buscados pela chave primária (o resultado é exato quando
+    a amostra cobre todos os IDs).
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        mode (str): 'exact' ou 'estimated'.
+        filters (dict): Filtros opcionais (ver cota_filters).
+
+    Returns:
+        int: Quantidade de cotas.
+    """
+    if not cota_filters(Cota, filters):
+        return read_cota_counter(db)
+
+    if mode == "exact":
+        stmt = select(func.count(Cota.id)).where(*cota_filters(Cota, filters))
+        return sum(row[0] for row in _aggregate(db, stmt))
+
+    # A amostra percorre toda a faixa de IDs, para não representar só as cotas mais antigas
+    bounds = [row for row in _aggregate(db, select(func.min(Cota.id), func.max(Cota.id))) if row[0] is not None]
+    if not bounds:
+        return 0
+    low = min(row[0] for row in bounds)
+    high = max(row[1] for row in bounds)
+    step = -(-(high - low + 1) // COUNT_SAMPLE_SIZE)
+    sample = aliased(Cota, select(Cota).where(Cota.id.in_(range(low, high + 1, step))).subquery())
+    stmt = select(
+        func.count(sample.id),
+        func.coalesce(func.sum(case((and_(*cota_filters(sample, filters)), 1), else_=0)), 0),
+    )
+    rows = _aggregate(db, stmt)
+    sampled = sum(row[0] for row in rows)
+    matched = sum(row[1] for row in rows)
+    if step == 1:
+        return matched
+    if not sampled:
+        return count_cotas(db, "exact", filters)
+    return round(read_cota_counter(db) * matched / sampled)
+
+
+# Retorna os argumentos de execução do shard de uma cota ou, sem cota, de cada shard
+def _shard_binds(db: Session, cota: Cota = None) -> list:
+    # No modo particionado, contadores e totais de carteiras de cada shard cobrem apenas as suas cotas
+    router = get_router(db)
+    if router is None:
+        return [{}]
+    if cota is not None:
+        return [{"shard_id": router.shard_for_id(cota.id)}]
+    return [{"shard_id": shard_id} for shard_id in router.active_shards()]
+
+
+# Atualiza o contador de cotas (cotas de investimentos) na transação corrente
+def adjust_cota_counter(db: Session, cota: Cota, delta: int):
+    """
+    Soma 'delta' ao contador de cotas, na mesma transação da inserção ou exclusão.
+
+    Deve ser chamada depois do flush da alteração: se o contador ainda não existir,
+    ele é criado com a contagem real da tabela, que já inclui a alteração.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        cota (Cota): Cota criada ou deletada.
+        delta (int): 1 na criação e -1 na exclusão.
+    """
+    bind = _shard_binds(db, cota)[0]
+    result = db.execute(
+        update(RowCounter)
+        .where(RowCounter.name == Cota.__tablename__)
+        .values(value=RowCounter.value + delta)
+        .execution_options(synchronize_session=False),
+        bind_arguments=bind,
+    )
+    if result.rowcount == 0:
+        db.execute(
+            insert(RowCounter).values(
+                name=Cota.__tablename__, value=select(func.count(Cota.id)).scalar_subquery()
+            ),
+            bind_arguments=bind,
+        )
+
+
+# Lê o total de cotas (cotas de investimentos) a partir do contador
+def read_cota_counter(db: Session) -> int:
+    """
+    Lê o total de cotas do contador, somando os shards no modo particionado.
+
+    Se algum shard ainda não tiver contador, ele é criado pela reconciliação.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        int: Quantidade de cotas.
+    """
+    stmt = select(func.count(RowCounter.name), func.coalesce(func.sum(RowCounter.value), 0)).where(
+        RowCounter.name == Cota.__tablename__
+    )
+    rows = _aggregate(db, stmt)
+    if not all(row[0] for row in rows):
+        reconcile_cota_counter(db)
+        rows = _aggregate(db, stmt)
+    return sum(row[1] for row in rows)
+
+
+# Corrige divergências entre o contador e a tabela de cotas (cotas de investimentos)
+def reconcile_cota_counter(db: Session) -> int:
+    """
+    Recalcula o contador de cotas com um COUNT real e corrige a diferença.
+
+    A linha do contador é bloqueada antes da contagem, para que criações e exclusões
+    concorrentes não se percam durante a correção.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        int: Quantidade de cotas de divergência corrigida (somando os shards).
+    """
+    drift = 0
+    for bind in _shard_binds(db):
+        current = db.execute(
+            select(RowCounter.value).where(RowCounter.name == Cota.__tablename__).with_for_update(),
+            bind_arguments=bind,
+        ).scalar()
+        actual = db.execute(select(func.count(Cota.id)), bind_arguments=bind).scalar()
+        if current is None:
+            db.execute(insert(RowCounter).values(name=Cota.__tablename__, value=actual), bind_arguments=bind)
+        elif current != actual:
+            db.execute(
+                update(RowCounter)
+                .where(RowCounter.name == Cota.__tablename__)
+                .values(value=actual)
+                .execution_options(synchronize_session=False),
+                bind_arguments=bind,
+            )
+        drift += abs(actual - (current or 0))
+    db.commit()
+    return drift
+
+
+# Calcula os totais de todas as cotas (cotas de investimentos)
+def summarize_cotas(db: Session):
+    """
+    Calcula a quantidade de cotas e a soma dos valores investidos, brutos e líquidos.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        dict: Totais consolidados de todas as cotas.
+    """
+    # As somas são feitas em centavos, sem erro de arredondamento
+    stmt = select(
+        func.count(Cota.id),
+        func.coalesce(func.sum(Cota.amount_cents), 0),
+        func.coalesce(func.sum(Cota.gross_value_cents), 0),
+        func.coalesce(func.sum(Cota.net_value_cents), 0),
+    )
+
+    # No modo particionado, cada shard agrega a sua parte e os totais são somados aqui
+    rows = _aggregate(db, stmt)
+
+    return {
+        "count": sum(row[0] for row in rows),
+        "total_amount": money.from_cents(sum(row[1] for row in rows)),
+        "total_gross_value": money.from_cents(sum(row[2] for row in rows)),
+        "total_net_value": money.from_cents(sum(row[3] for row in rows)),
+    }
+
+
+# Busca uma cota (cota de investimento) para alteração, bloqueando a linha até o commit
+def _get_cota_for_update(db: Session, cota_id: int):
+    # Relê a linha (mesmo que já esteja na sessão) para que os deltas das carteiras
+    # partam do estado atual da cota, e não de uma leitura antiga
+    return (
+        db.query(Cota)
+        .filter(Cota.id == cota_id)
+        .with_for_update()
+        .populate_existing()
+        .first()
+    )
+
+
 # Atualiza uma cota (cota de investimento) pelo ID
 def update_cota(db: Session, cota_id: int, cota: CotaCreate):
     """
@@ -111,26 +371,31 @@ def update_cota(db: Session, cota_id: int, cota: CotaCreate):
         Cota: Objeto da cota atualizada.
     """
     # Busca a cota no banco de dados
-    db_cota = db.query(Cota).filter(Cota.id == cota_id).first()
+    db_cota = _get_cota_for_update(db, cota_id)
 
     if db_cota is None:
         raise HTTPException(status_code=404, detail="Cota não encontrada.")
+    before = portfolio_contribution(db_cota)
 
     # Atualiza os dados da cota (cota de investimento)
     db_cota.name = cota.name
     db_cota.amount = cota.amount
     db_cota.interest_rate = cota.interest_rate
     db_cota.duration_months = cota.duration_months
+    # Sem o campo 'portfolio_id' a cota continua na carteira atual; com null, sai da carteira
+    if "portfolio_id" in cota.model_fields_set:
+        _check_portfolio(db, cota.portfolio_id)
+        db_cota.portfolio_id = cota.portfolio_id
 
-    # Calcula os valores de gross_value (valor bruto), net_value (valor líquido) e profitability (rentabilidade)
-    gross_value, net_value, profitability = calculate_cota_values(
-        cota.amount, cota.interest_rate, cota.duration_months, db_cota.tax
-    )
-
-    # Atualiza os valores calculados no banco
-    db_cota.gross_value = gross_value
-    db_cota.net_value = net_value
-    db_cota.profitability = profitability  # Atualiza a rentabilidade
+    # Calcula e atualiza os valores de gross_value (valor bruto), net_value (valor líquido)
+    # e profitability (rentabilidade)
+    try:
+        apply_cota_values(db_cota)
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    record_change(db, db_cota, "update")
+    update_portfolio_rollups(db, db_cota, before, portfolio_contribution(db_cota))
 
     # Commit e refresh do banco de dados
     db.commit()
@@ -151,12 +416,486 @@ def delete_cota(db: Session, cota_id: int):
     Returns:
         Cota: Objeto da cota deletada.
     """
-    db_cota = db.query(Cota).filter(Cota.id == cota_id).first()
+    db_cota = _get_cota_for_update(db, cota_id)
     if db_cota is None:
         raise HTTPException(status_code=404, detail="Cota não encontrada.")
 
+    record_change(db, db_cota, "delete")
     db.delete(db_cota)
+    db.flush()
+    adjust_cota_counter(db, db_cota, -1)
+    update_portfolio_rollups(db, db_cota, portfolio_contribution(db_cota), None)
     db.commit()
 
     return db_cota
 
+
+# Cria uma carteira de cotas
+def create_portfolio(db: Session, portfolio: PortfolioCreate):
+    """
+    Cria uma nova carteira, com os totais zerados.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        portfolio (PortfolioCreate): Dados da carteira a ser criada.
+
+    Returns:
+        Portfolio: Objeto da carteira criada.
+    """
+    db_portfolio = Portfolio(**portfolio.model_dump())
+    db.add(db_portfolio)
+    db.flush()
+    # No modo particionado, cada shard recebe a sua linha de totais da carteira
+    for bind in _shard_binds(db):
+        db.execute(insert(PortfolioRollup).values(portfolio_id=db_portfolio.id), bind_arguments=bind)
+    db.commit()
+    db.refresh(db_portfolio)
+    return db_portfolio
+
+
+# Busca uma carteira pelo ID
+def get_portfolio(db: Session, portfolio_id: int):
+    """
+    Busca uma carteira pelo ID no banco de dados.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        portfolio_id (int): ID da carteira.
+
+    Returns:
+        Portfolio: Objeto da carteira encontrada ou None se não existir.
+    """
+    return db.query(Portfolio).filter(Portfolio.id == portfolio_id).first()
+
+
+# Verifica se a carteira informada para uma cota existe
+def _check_portfolio(db: Session, portfolio_id: int):
+    if portfolio_id is not None and get_portfolio(db, portfolio_id) is None:
+        raise HTTPException(status_code=400, detail="Carteira não encontrada.")
+
+
+# Calcula a contribuição de uma cota (cota de investimento) para os totais da sua carteira
+def portfolio_contribution(cota: Cota):
+    """
+    Calcula quanto uma cota soma a cada total acumulado da sua carteira.
+
+    Args:
+        cota (Cota): Cota com valores calculados.
+
+    Returns:
+        tuple: (ID da carteira, dicionário coluna -> valor), ou None se a cota não tiver carteira.
+    """
+    if cota.portfolio_id is None:
+        return None
+    values = dict.fromkeys(ROLLUP_COLUMNS, 0)
+    values.update(
+        cota_count=1,
+        amount_cents=cota.amount_cents,
+        gross_value_cents=cota.gross_value_cents or 0,
+        net_value_cents=cota.net_value_cents or 0,
+        rate_weight=cota.amount_cents * cota.interest_rate_bp,
+    )
+    values[maturity_column(cota.duration_months)] = cota.amount_cents
+    return cota.portfolio_id, values
+
+
+# Soma deltas aos totais de uma carteira no shard informado
+def _add_to_rollup(db: Session, portfolio_id: int, delta: dict, bind: dict):
+    delta = {column: value for column, value in delta.items() if value}
+    if not delta:
+        return
+    result = db.execute(
+        update(PortfolioRollup)
+        .where(PortfolioRollup.portfolio_id == portfolio_id)
+        .values({column: getattr(PortfolioRollup, column) + value for column, value in delta.items()})
+        .execution_options(synchronize_session=False),
+        bind_arguments=bind,
+    )
+    if result.rowcount == 0:
+        # Shard criado depois da carteira (ex.: após a divisão de um shard)
+        db.execute(insert(PortfolioRollup).values(portfolio_id=portfolio_id, **delta), bind_arguments=bind)
+
+
+# Atualiza os totais das carteiras após a alteração de uma cota (cota de investimento)
+def update_portfolio_rollups(db: Session, cota: Cota, before, after):
+    """
+    Aplica aos totais das carteiras a diferença entre a contribuição anterior e a
+    nova contribuição de uma cota, na transação corrente.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        cota (Cota): Cota criada, atualizada ou deletada.
+        before (tuple): Contribuição antes da alteração (None na criação ou sem carteira).
+        after (tuple): Contribuição depois da alteração (None na exclusão ou sem carteira).
+    """
+    bind = _shard_binds(db, cota)[0]
+    if before is not None and after is not None and before[0] == after[0]:
+        _add_to_rollup(
+            db, after[0], {column: after[1][column] - before[1][column] for column in ROLLUP_COLUMNS}, bind
+        )
+        return
+    if before is not None:
+        _add_to_rollup(db, before[0], {column: -value for column, value in before[1].items()}, bind)
+    if after is not None:
+        _add_to_rollup(db, after[0], after[1], bind)
+
+
+# Retorna os totais de uma carteira a partir dos valores acumulados
+def summarize_portfolio(db: Session, portfolio_id: int):
+    """
+    Lê os totais acumulados de uma carteira, sem carregar as suas cotas.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        portfolio_id (int): ID da carteira.
+
+    Returns:
+        dict: Totais da carteira, ou None se a carteira não existir.
+    """
+    if get_portfolio(db, portfolio_id) is None:
+        return None
+
+    # No modo particionado, soma a linha de totais de cada shard
+    stmt = select(
+        *(func.coalesce(func.sum(getattr(PortfolioRollup, column)), 0) for column in ROLLUP_COLUMNS)
+    ).where(PortfolioRollup.portfolio_id == portfolio_id)
+    totals = dict.fromkeys(ROLLUP_COLUMNS, 0)
+    for row in _aggregate(db, stmt):
+        for column, value in zip(ROLLUP_COLUMNS, row):
+            totals[column] += value
+
+    amount_cents = totals["amount_cents"]
+    # Taxa média em centésimos de ponto-base, convertida para % ao mês
+    average_rate = money.div_round(totals["rate_weight"] * 100, amount_cents) / 10_000 if amount_cents else 0.0
+    return {
+        "portfolio_id": portfolio_id,
+        "count": totals["cota_count"],
+        "total_amount": money.from_cents(amount_cents),
+        "total_gross_value": money.from_cents(totals["gross_value_cents"]),
+        "total_net_value": money.from_cents(totals["net_value_cents"]),
+        "average_interest_rate": average_rate,
+        "maturity_distribution": {
+            label: money.from_cents(totals[column]) for _, column, label in MATURITY_BUCKETS
+        },
+    }
+
+
+# Expressões que recalculam, a partir das cotas, cada total acumulado das carteiras
+def _rollup_aggregates() -> list:
+    aggregates = {
+        "cota_count": func.count(Cota.id),
+        "amount_cents": func.sum(Cota.amount_cents),
+        "gross_value_cents": func.sum(func.coalesce(Cota.gross_value_cents, 0)),
+        "net_value_cents": func.sum(func.coalesce(Cota.net_value_cents, 0)),
+        "rate_weight": func.sum(Cota.amount_cents * Cota.interest_rate_bp),
+    }
+    min_months = 0
+    for max_months, column, _ in MATURITY_BUCKETS:
+        in_bucket = Cota.duration_months > min_months
+        if max_months is not None:
+            in_bucket = and_(in_bucket, Cota.duration_months <= max_months)
+        aggregates[column] = func.sum(case((in_bucket, Cota.amount_cents), else_=0))
+        min_months = max_months
+    return [func.coalesce(aggregates[column], 0) for column in ROLLUP_COLUMNS]
+
+
+# Recalcula os totais das carteiras a partir das cotas
+def rebuild_portfolio_rollups(db: Session, portfolio_id: int = None) -> list:
+    """
+    Recalcula os totais acumulados das carteiras a partir das cotas e corrige as divergências.
+
+    Serve para verificar se os deltas aplicados a cada alteração mantêm os totais
+    corretos. As linhas de totais são bloqueadas antes do recálculo, como na
+    reconciliação do contador de cotas.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        portfolio_id (int): Carteira a recalcular (padrão: todas).
+
+    Returns:
+        list: IDs das carteiras cujos totais divergiam e foram corrigidos.
+    """
+    rollups = PortfolioRollup.__table__
+    stored_stmt = select(rollups.c.portfolio_id, *(rollups.c[column] for column in ROLLUP_COLUMNS))
+    actual_stmt = (
+        select(Cota.portfolio_id, *_rollup_aggregates())
+        .where(Cota.portfolio_id.is_not(None))
+        .group_by(Cota.portfolio_id)
+    )
+    if portfolio_id is not None:
+        stored_stmt = stored_stmt.where(rollups.c.portfolio_id == portfolio_id)
+        actual_stmt = actual_stmt.where(Cota.portfolio_id == portfolio_id)
+
+    corrected = set()
+    zeros = (0,) * len(ROLLUP_COLUMNS)
+    for bind in _shard_binds(db):
+        stored = {
+            row[0]: tuple(row[1:])
+            for row in db.execute(stored_stmt.with_for_update(), bind_arguments=bind)
+        }
+        actual = {row[0]: tuple(row[1:]) for row in db.execute(actual_stmt, bind_arguments=bind)}
+        for key in stored.keys() | actual.keys():
+            values = actual.get(key, zeros)
+            if stored.get(key) == values:
+                continue
+            corrected.add(key)
+            row = dict(zip(ROLLUP_COLUMNS, values))
+            if key in stored:
+                db.execute(update(rollups).where(rollups.c.portfolio_id == key).values(row), bind_arguments=bind)
+            else:
+                db.execute(insert(rollups).values(portfolio_id=key, **row), bind_arguments=bind)
+    db.commit()
+    return sorted(corrected)
+
+
+# Reserva o próximo número de sequência do feed de alterações
+def _next_change_seq(db: Session, bind: dict) -> int:
+    """
+    Incrementa o contador de sequência do feed e retorna o novo valor.
+
+    A linha do contador fica bloqueada até o fim da transação, de modo que as
+    transações que gravam eventos são confirmadas na mesma ordem dos seus números
+    de sequência (um consumidor nunca recebe um evento com sequência menor do que
+    a de um evento que já leu). O autoincremento, sozinho, não garante isso em
+    bancos que confirmam transações concorrentes fora de ordem.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        bind (dict): Argumentos de execução do shard do evento.
+
+    Returns:
+        int: Número de sequência reservado.
+    """
+    name = CotaChange.__tablename__
+    result = db.execute(
+        update(RowCounter)
+        .where(RowCounter.name == name)
+        .values(value=RowCounter.value + 1)
+        .execution_options(synchronize_session=False),
+        bind_arguments=bind,
+    )
+    if result.rowcount == 0:
+        # Primeiro uso: continua a partir do maior número já gravado
+        db.execute(
+            insert(RowCounter).values(
+                name=name,
+                value=select(func.coalesce(func.max(CotaChange.seq), 0) + 1).scalar_subquery(),
+            ),
+            bind_arguments=bind,
+        )
+    return db.execute(
+        select(RowCounter.value).where(RowCounter.name == name), bind_arguments=bind
+    ).scalar()
+
+
+# Registra um evento de alteração de cota (cota de investimento) no feed
+def record_change(db: Session, cota: Cota, operation: str):
+    """
+    Adiciona à sessão um evento de alteração, gravado no commit da própria alteração.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        cota (Cota): Cota criada, atualizada ou deletada.
+        operation (str): Tipo de alteração ('create', 'update' ou 'delete').
+
+    Returns:
+        CotaChange: Evento adicionado à sessão.
+    """
+    payload = None
+    if operation != "delete":
+        payload = CotaResponse.model_validate(cota).model_dump(mode="json")
+
+    seq = _next_change_seq(db, _shard_binds(db, cota)[0])
+    change = CotaChange(seq=seq, cota_id=cota.id, operation=operation, payload=payload)
+    db.add(change)
+    return change
+
+
+# Registra no feed de um shard que cotas foram movidas para outro shard
+def record_moves(db: Session, cota_ids: list, target: str) -> int:
+    """
+    Grava um evento 'move' para cada cota movida na divisão de um shard.
+
+    O evento marca, no feed do shard de origem, o ponto a partir do qual os eventos
+    da cota continuam no feed do shard de destino.
+
+    Args:
+        db (Session): Sessão ligada diretamente ao banco do shard de origem.
+        cota_ids (list): IDs das cotas movidas.
+        target (str): ID do shard de destino.
+
+    Returns:
+        int: Quantidade de eventos gravados.
+    """
+    for cota_id in cota_ids:
+        db.add(CotaChange(
+            seq=_next_change_seq(db, {}), cota_id=cota_id, operation="move", payload={"shard": target}
+        ))
+    return len(cota_ids)
+
+
+# Lista os eventos de alteração posteriores a um número de sequência
+def list_changes(db: Session, since: int = 0, limit: int = 100, shard: str = None):
+    """
+    Lista os eventos de alteração com número de sequência maior que 'since'.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        since (int): Último número de sequência já processado pelo consumidor.
+        limit (int): Número máximo de eventos a retornar.
+        shard (str): Shard consultado; obrigatório no modo particionado.
+
+    Returns:
+        list: Eventos em ordem crescente de sequência.
+
+    Raises:
+        HTTPException: 410 se 'since' for anterior aos eventos compactados; o corpo traz
+            'last_seq' (sequência atual) e 'oldest_seq' (evento mais antigo mantido).
+    """
+    query = db.query(CotaChange)
+    # No modo particionado cada shard tem a sua própria sequência de eventos; o consumidor
+    # acompanha cada shard separadamente (e segue os eventos 'move' após uma divisão)
+    router = get_router(db)
+    if router is not None:
+        if shard is None:
+            raise HTTPException(
+                status_code=400, detail="Informe o shard ('shard') no modo particionado."
+            )
+        if shard not in router.shards:
+            raise HTTPException(status_code=404, detail="Shard não encontrado.")
+        query = query.set_shard(shard)
+
+    # Eventos já compactados não podem ser entregues; o consumidor precisa ressincronizar.
+    # A resposta informa a sequência atual, a partir da qual o consumidor continua após a listagem
+    oldest, newest = query.with_entities(func.min(CotaChange.seq), func.max(CotaChange.seq)).one()
+    if oldest is not None and since < oldest - 1:
+        raise HTTPException(status_code=410, detail={
+            "detalhe": "Eventos anteriores foram compactados. Refaça a listagem completa das cotas "
+                       "e continue a partir de 'last_seq'.",
+            "last_seq": newest,
+            "oldest_seq": oldest,
+        })
+
+    return (
+        query.filter(CotaChange.seq > since)
+        .order_by(CotaChange.seq)
+        .limit(limit)
+        .all()
+    )
+
+
+# Remove eventos de alteração antigos (política de retenção)
+def compact_changes(db: Session, retention_seconds: int):
+    """
+    Remove os eventos mais antigos que o período de retenção.
+
+    O evento mais recente é sempre mantido para que a sequência não seja reiniciada
+    e consumidores atrasados possam ser detectados.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        retention_seconds (int): Idade máxima, em segundos, dos eventos mantidos.
+
+    Returns:
+        int: Quantidade de eventos removidos.
+    """
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=retention_seconds)
+    newest = select(func.max(CotaChange.seq)).scalar_subquery()
+
+    removed = (
+        db.query(CotaChange)
+        .filter(CotaChange.created_at < cutoff, CotaChange.seq < newest)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return removed
+
+
+# Cria um job em segundo plano
+def create_job(db: Session, job: JobCreate, max_pending: int):
+    """
+    Registra um novo job com status 'pending'.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        job (JobCreate): Tipo e parâmetros do job.
+        max_pending (int): Tamanho máximo da fila de jobs pendentes.
+
+    Returns:
+        Job: Objeto do job criado.
+    """
+    pending = db.query(func.count(Job.id)).filter(Job.status == "pending").scalar()
+    if pending >= max_pending:
+        raise HTTPException(status_code=503, detail="Fila de jobs cheia. Tente novamente mais tarde.")
+
+    db_job = Job(kind=job.kind, params=job.params, status="pending")
+    db.add(db_job)
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+
+# Busca um job pelo ID
+def get_job(db: Session, job_id: int):
+    """
+    Busca um job pelo ID no banco de dados.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        job_id (int): ID do job.
+
+    Returns:
+        Job: Objeto do job encontrado ou None se não existir.
+    """
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+# Solicita o cancelamento de um job
+def cancel_job(db: Session, job_id: int):
+    """
+    Cancela um job pendente ou solicita a interrupção de um job em execução.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        job_id (int): ID do job.
+
+    Returns:
+        Job: Objeto do job atualizado.
+    """
+    db_job = get_job(db, job_id)
+    if db_job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado.")
+
+    if db_job.status == "pending":
+        db_job.status = "cancelled"
+        db_job.finished_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    elif db_job.status == "running":
+        # O executor verifica esta marcação entre os lotes de cotas
+        db_job.cancel_requested = True
+    else:
+        raise HTTPException(status_code=409, detail="O job já foi finalizado.")
+
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+
+# Descarta os resultados de jobs expirados
+def expire_jobs(db: Session):
+    """
+    Remove o resultado dos jobs cuja data de expiração já passou.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        int: Quantidade de jobs expirados.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    expired = (
+        db.query(Job)
+        .filter(Job.expires_at < now, Job.status != "expired")
+        .update({"status": "expired", "result": None}, synchronize_session=False)
+    )
+    db.commit()
+    return expired
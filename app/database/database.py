@@ -3,6 +3,7 @@ import os
 import logging
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from app.database.sharding import ShardRouter
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -17,8 +18,16 @@ engine = create_engine(
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 )
 
+# URLs dos shards separadas por vírgula (modo particionado); vazio usa apenas DATABASE_URL
+SHARD_URLS = [url.strip() for url in os.getenv("SHARD_URLS", "").split(",") if url.strip()]
+
 # Criando a sessão do banco de dados
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if SHARD_URLS:
+    shard_router = ShardRouter(SHARD_URLS)
+    SessionLocal = shard_router.session
+else:
+    shard_router = None
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Base para os modelos
 Base = declarative_base()
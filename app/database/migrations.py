@@ -0,0 +1,155 @@
+# Migrações de esquema do banco de dados
+import logging
+from sqlalchemy import inspect, text
+from app import money
+
+logger = logging.getLogger(__name__)
+
+# Colunas em float substituídas por colunas inteiras (centavos e pontos-base)
+FLOAT_COLUMNS = ("amount", "interest_rate", "tax", "gross_value", "net_value", "profitability")
+FIXED_POINT_COLUMNS = {
+    "amount_cents": "BIGINT",
+    "interest_rate_bp": "INTEGER",
+    "tax_bp": "INTEGER",
+    "gross_value_cents": "BIGINT",
+    "net_value_cents": "BIGINT",
+    "profitability_cents": "BIGINT",
+}
+
+
+def _fixed_point_values(row) -> dict:
+    """
+    Converte uma linha com valores em float para centavos e pontos-base.
+
+    Os valores calculados são refeitos com aritmética exata; se a cota tiver
+    valores inválidos, os valores gravados são apenas arredondados para o centavo.
+    """
+    tax = row.tax if row.tax is not None else money.bp_to_fraction(money.DEFAULT_TAX_BP)
+    values = {
+        "id": row.id,
+        "amount_cents": money.to_cents(row.amount),
+        "interest_rate_bp": money.percent_to_bp(row.interest_rate),
+        "tax_bp": money.fraction_to_bp(tax),
+    }
+    try:
+        gross_value, net_value, profitability = money.calculate_cota_values_cents(
+            values["amount_cents"], values["interest_rate_bp"], row.duration_months, values["tax_bp"]
+        )
+    except ValueError:
+        gross_value, net_value, profitability = (
+            None if value is None else money.to_cents(value)
+            for value in (row.gross_value, row.net_value, row.profitability)
+        )
+    values.update(
+        gross_value_cents=gross_value, net_value_cents=net_value, profitability_cents=profitability
+    )
+    return values
+
+
+def migrate_cotas_to_fixed_point(engine, batch_size: int = 1000) -> int:
+    """
+    Migra a tabela 'cotas' das colunas em float para colunas inteiras em ponto fixo.
+
+    A migração é idempotente: não faz nada se a tabela não existir ou já estiver migrada.
+    Tudo acontece em uma única transação.
+
+    Args:
+        engine (Engine): Engine do banco de dados a ser migrado.
+        batch_size (int): Quantidade de linhas convertidas por lote.
+
+    Returns:
+        int: Quantidade de cotas convertidas.
+    """
+    inspector = inspect(engine)
+    if "cotas" not in inspector.get_table_names():
+        return 0
+    columns = {column["name"] for column in inspector.get_columns("cotas")}
+    if "amount_cents" in columns:
+        return 0
+
+    converted = 0
+    with engine.begin() as conn:
+        for name, type_ in FIXED_POINT_COLUMNS.items():
+            conn.execute(text(f"ALTER TABLE cotas ADD COLUMN {name} {type_}"))
+
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                text(
+                    "SELECT id, amount, interest_rate, duration_months, tax, gross_value, "
+                    "net_value, profitability FROM cotas WHERE id > :last_id ORDER BY id LIMIT :limit"
+                ),
+                {"last_id": last_id, "limit": batch_size},
+            ).all()
+            if not rows:
+                break
+            conn.execute(
+                text(
+                    "UPDATE cotas SET amount_cents = :amount_cents, interest_rate_bp = :interest_rate_bp, "
+                    "tax_bp = :tax_bp, gross_value_cents = :gross_value_cents, "
+                    "net_value_cents = :net_value_cents, profitability_cents = :profitability_cents "
+                    "WHERE id = :id"
+                ),
+                [_fixed_point_values(row) for row in rows],
+            )
+            converted += len(rows)
+            last_id = rows[-1].id
+
+        for name in FLOAT_COLUMNS:
+            conn.execute(text(f"ALTER TABLE cotas DROP COLUMN {name}"))
+
+    logger.info(f"{converted} cotas migradas para valores em ponto fixo.")
+    return converted
+
+
+def add_cota_portfolio_column(engine) -> bool:
+    """
+    Adiciona à tabela 'cotas' a coluna 'portfolio_id' (carteira da cota) e o seu índice.
+
+    A migração é idempotente: não faz nada se a tabela não existir ou já tiver a coluna.
+
+    Args:
+        engine (Engine): Engine do banco de dados a ser migrado.
+
+    Returns:
+        bool: True se a coluna foi adicionada.
+    """
+    inspector = inspect(engine)
+    if "cotas" not in inspector.get_table_names():
+        return False
+    columns = {column["name"] for column in inspector.get_columns("cotas")}
+    if "portfolio_id" in columns:
+        return False
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE cotas ADD COLUMN portfolio_id INTEGER"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_cotas_portfolio_id ON cotas (portfolio_id)"))
+
+    logger.info("Coluna 'portfolio_id' adicionada à tabela de cotas.")
+    return True
+
+
+def add_job_heartbeat_column(engine) -> bool:
+    """
+    Adiciona à tabela 'jobs' a coluna 'heartbeat_at' (último sinal de vida do worker).
+
+    A migração é idempotente: não faz nada se a tabela não existir ou já tiver a coluna.
+
+    Args:
+        engine (Engine): Engine do banco de dados a ser migrado.
+
+    Returns:
+        bool: True se a coluna foi adicionada.
+    """
+    inspector = inspect(engine)
+    if "jobs" not in inspector.get_table_names():
+        return False
+    columns = {column["name"] for column in inspector.get_columns("jobs")}
+    if "heartbeat_at" in columns:
+        return False
+
+    with engine.begin() as conn:
+        conn.execute(text("ALTER TABLE jobs ADD COLUMN heartbeat_at DATETIME"))
+
+    logger.info("Coluna 'heartbeat_at' adicionada à tabela de jobs.")
+    return True
@@ -0,0 +1,237 @@
+# Ferramenta de rebalanceamento: divide um shard em dois sem parar a API
+import argparse
+import logging
+import time
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+from app.database.sharding import (
+    MAP_TTL_SECONDS, NUM_BUCKETS, ShardRouter, shard_buckets, shard_counters, shard_nodes
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _bucket_rows(conn, table, buckets, batch_size):
+    """
+    Lê em lotes (por faixa de ID) as linhas de uma tabela que pertencem aos buckets informados.
+
+    Yields:
+        Row: Linhas da tabela em ordem crescente de ID.
+    """
+    last_id = None
+    while True:
+        stmt = (
+            select(table)
+            .where((table.c.id % NUM_BUCKETS).in_(buckets))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        )
+        if last_id is not None:
+            stmt = stmt.where(table.c.id > last_id)
+        rows = conn.execute(stmt).all()
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1].id
+
+
+def _unchanged_since(table, values: tuple) -> list:
+    """
+    Monta os critérios que casam uma linha somente se ela ainda tiver os valores informados.
+
+    Args:
+        table (Table): Tabela particionada.
+        values (tuple): Valores da linha, na ordem das colunas da tabela.
+
+    Returns:
+        list: Critérios de comparação (tratando NULL como valor).
+    """
+    return [column.is_not_distinct_from(value) for column, value in zip(table.columns, values)]
+
+
+def split_shard(router: ShardRouter, source: str, url: str, table, metadata, batch_size: int = 500,
+                grace_seconds: float = 2 * MAP_TTL_SECONDS, fence=None):
+    """
+    Divide um shard movendo metade dos seus buckets para um novo banco de dados.
+
+    O processo é online: as linhas são copiadas enquanto o shard de origem continua
+    atendendo; o mapa de buckets é trocado no catálogo; após o período de validade
+    do cache dos roteadores, as alterações feitas na origem durante a cópia são
+    reaplicadas no destino (sem sobrescrever linhas já alteradas no destino após a
+    troca) e, por fim, as linhas movidas são removidas da origem.
+
+    Args:
+        router (ShardRouter): Roteador conectado ao catálogo.
+        source (str): ID do shard a ser dividido.
+        url (str): URL do novo banco de dados.
+        table (Table): Tabela particionada (ex.: Cota.__table__).
+        metadata (MetaData): Metadados usados para criar as tabelas no novo shard.
+        batch_size (int): Quantidade de linhas copiadas por lote.
+        grace_seconds (float): Espera após a troca do mapa, para que os roteadores o recarreguem.
+        fence (callable): Recebe uma sessão do shard de origem, os IDs movidos e o shard de
+            destino, e roda na transação que remove as linhas da origem (ex.: crud.record_moves,
+            que marca no feed de alterações da origem onde os eventos de cada cota passam a
+            ser gravados).
+
+    Returns:
+        dict: Resumo da operação (novo shard, buckets e linhas movidas).
+    """
+    router.reload()
+    buckets = router.buckets_of(source)
+    if len(buckets) < 2:
+        raise ValueError(f"O shard {source} não possui buckets suficientes para ser dividido.")
+    # Move buckets alternados para que IDs sequenciais se dividam igualmente
+    moving = buckets[1::2]
+
+    # 1. Registra o novo shard e cria suas tabelas
+    with router.catalog.begin() as conn:
+        ids = conn.execute(select(shard_nodes.c.shard_id)).scalars().all()
+        target = str(max(int(i) for i in ids) + 1)
+        conn.execute(insert(shard_nodes).values(shard_id=target, url=url))
+    router.reload()
+    engines = router.shards
+    metadata.create_all(bind=engines[target])
+
+    # 2. Cópia inicial, guardando um snapshot para detectar alterações concorrentes
+    snapshot = {}
+    with engines[source].connect() as src, engines[target].begin() as dst:
+        for row in _bucket_rows(src, table, moving, batch_size):
+            snapshot[row.id] = tuple(row)
+            dst.execute(insert(table).values(**row._mapping))
+    logger.info(f"Shard {source}: {len(snapshot)} linhas copiadas para o shard {target}.")
+
+    # 3. Troca o dono dos buckets no catálogo
+    with router.catalog.begin() as conn:
+        conn.execute(
+            update(shard_buckets).where(shard_buckets.c.bucket.in_(moving)).values(shard_id=target)
+        )
+        conn.execute(
+            update(shard_counters)
+            .where(shard_counters.c.name == "map_version")
+            .values(value=shard_counters.c.value + 1)
+        )
+    router.reload()
+
+    # 4. Aguarda os demais processos recarregarem o mapa
+    time.sleep(grace_seconds)
+
+    # 5. Reaplica no destino o que foi escrito na origem por roteadores desatualizados.
+    #    Depois da troca do mapa, o destino pode ter recebido escritas mais novas; por isso
+    #    cada linha só é sobrescrita (ou removida) se ainda estiver igual ao snapshot da cópia
+    with engines[source].begin() as src, engines[target].begin() as dst:
+        seen = set()
+        for row in _bucket_rows(src, table, moving, batch_size):
+            seen.add(row.id)
+            if row.id not in snapshot:
+                exists = dst.execute(select(table.c.id).where(table.c.id == row.id)).first()
+                if exists is None:
+                    dst.execute(insert(table).values(**row._mapping))
+            elif tuple(row) != snapshot[row.id]:
+                dst.execute(
+                    update(table)
+                    .where(*_unchanged_since(table, snapshot[row.id]))
+                    .values(**row._mapping)
+                )
+        for cota_id in snapshot.keys() - seen:
+            dst.execute(delete(table).where(*_unchanged_since(table, snapshot[cota_id])))
+
+        # 6. Remove da origem as linhas que agora pertencem ao novo shard
+        moved = len(seen)
+        src.execute(delete(table).where((table.c.id % NUM_BUCKETS).in_(moving)))
+        if fence is not None:
+            with Session(bind=src) as session:
+                fence(session, sorted(seen), target)
+                session.flush()
+
+    logger.info(f"Shard {source} dividido: {len(moving)} buckets e {moved} linhas no shard {target}.")
+    return {"source": source, "target": target, "buckets": moving, "rows": moved}
+
+
+def redistribute(router: ShardRouter, table, batch_size: int = 500, fence=None) -> int:
+    """
+    Move para o shard dono do bucket as linhas guardadas em outro shard.
+
+    Ao criar o catálogo, os buckets são distribuídos entre os shards iniciais, mas
+    as linhas que já existiam (ex.: um banco único usado como primeiro shard)
+    continuam onde estavam e deixariam de ser encontradas nas buscas por ID. Só atua
+    antes da primeira divisão (versão 1 do mapa), pois durante uma divisão as linhas
+    copiadas ficam temporariamente fora do shard dono do bucket. Deve rodar antes de
+    a API atender requisições, como a criação das tabelas.
+
+    Args:
+        router (ShardRouter): Roteador conectado ao catálogo.
+        table (Table): Tabela particionada (ex.: Cota.__table__).
+        batch_size (int): Quantidade de linhas movidas por lote.
+        fence (callable): Mesmo papel do 'fence' de split_shard, chamado na transação que
+            remove cada lote do shard de origem.
+
+    Returns:
+        int: Quantidade de linhas movidas.
+    """
+    router.reload()
+    if router.map_version != 1:
+        return 0
+    engines = router.shards
+    moved = 0
+    for source in router.active_shards():
+        foreign = sorted(set(range(NUM_BUCKETS)) - set(router.buckets_of(source)))
+        while True:
+            with engines[source].begin() as src:
+                rows = src.execute(
+                    select(table)
+                    .where((table.c.id % NUM_BUCKETS).in_(foreign))
+                    .order_by(table.c.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+                by_target = {}
+                for row in rows:
+                    by_target.setdefault(router.shard_for_id(row.id), []).append(row)
+                for target, target_rows in by_target.items():
+                    ids = [row.id for row in target_rows]
+                    # Linhas já copiadas por uma execução interrompida não são inseridas de novo
+                    with engines[target].begin() as dst:
+                        present = set(dst.execute(select(table.c.id).where(table.c.id.in_(ids))).scalars())
+                        missing = [dict(row._mapping) for row in target_rows if row.id not in present]
+                        if missing:
+                            dst.execute(insert(table), missing)
+                    if fence is not None:
+                        with Session(bind=src) as session:
+                            fence(session, ids, target)
+                            session.flush()
+                src.execute(delete(table).where(table.c.id.in_([row.id for row in rows])))
+            moved += len(rows)
+
+    if moved:
+        logger.info(f"{moved} linhas movidas para o shard dono do seu bucket.")
+    return moved
+
+
+if __name__ == "__main__":
+    from app.crud import crud
+    from app.database.database import Base, shard_router
+    from app.models.cota_model import Cota
+
+    parser = argparse.ArgumentParser(description="Divide um shard de cotas em dois.")
+    parser.add_argument("source", help="ID do shard a ser dividido.")
+    parser.add_argument("url", help="URL do banco de dados do novo shard.")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    if shard_router is None:
+        raise SystemExit("Defina SHARD_URLS para usar o modo particionado.")
+
+    result = split_shard(
+        shard_router, args.source, args.url, Cota.__table__, Base.metadata, args.batch_size,
+        fence=crud.record_moves,
+    )
+    print(f"Shard {result['source']} dividido; {result['rows']} cotas movidas para o shard {result['target']}.")
+
+    # As cotas movidas mudam de shard sem passar pelo CRUD; contadores e totais são recalculados
+    db = shard_router.session()
+    try:
+        crud.reconcile_cota_counter(db)
+        crud.rebuild_portfolio_rollups(db)
+    finally:
+        db.close()
@@ -0,0 +1,408 @@
+# Importações necessárias
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import (
+    Column, Integer, MetaData, String, Table, create_engine, func, select, update
+)
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators, visitors
+from sqlalchemy.sql.elements import BindParameter, ColumnElement
+
+# Número fixo de buckets lógicos; cada bucket pertence a exatamente um shard
+NUM_BUCKETS = 256
+# Quantidade de IDs reservados por ida ao catálogo (alocação hi-lo)
+ID_BLOCK_SIZE = 1000
+# Intervalo (segundos) em que o mapa de buckets em cache é considerado válido
+MAP_TTL_SECONDS = 1.0
+# Shard que abriga o catálogo e as tabelas não particionadas (modelos com __shard_id__)
+CATALOG_SHARD = "0"
+
+# Tabelas do catálogo, mantidas apenas no primeiro shard (shard "0")
+catalog_metadata = MetaData()
+
+shard_nodes = Table(
+    "shard_nodes",
+    catalog_metadata,
+    Column("shard_id", String, primary_key=True),
+    Column("url", String, nullable=False),
+)
+
+shard_buckets = Table(
+    "shard_buckets",
+    catalog_metadata,
+    Column("bucket", Integer, primary_key=True),
+    Column("shard_id", String, nullable=False),
+)
+
+shard_counters = Table(
+    "shard_counters",
+    catalog_metadata,
+    Column("name", String, primary_key=True),
+    Column("value", Integer, nullable=False),
+)
+
+
+def make_engine(url: str):
+    """
+    Cria uma engine com as mesmas opções usadas pela conexão principal.
+
+    Args:
+        url (str): URL do banco de dados.
+
+    Returns:
+        Engine: Engine do SQLAlchemy.
+    """
+    return create_engine(
+        url,
+        connect_args={"check_same_thread": False} if "sqlite" in url else {}
+    )
+
+
+def bucket_for(cota_id: int) -> int:
+    """
+    Calcula o bucket lógico de uma cota a partir do seu ID (chave de shard).
+
+    Args:
+        cota_id (int): ID da cota.
+
+    Returns:
+        int: Bucket entre 0 e NUM_BUCKETS - 1.
+    """
+    return int(cota_id) % NUM_BUCKETS
+
+
+def _id_comparisons(statement, id_column):
+    """
+    Extrai os valores comparados com a coluna de ID no WHERE de um statement.
+
+    Args:
+        statement: Statement (select/update/delete) sendo executado.
+        id_column: Coluna de chave primária usada como chave de shard.
+
+    Returns:
+        list: Valores de ID encontrados em comparações de igualdade ou IN.
+    """
+    values = []
+
+    def visit_binary(binary):
+        if not isinstance(binary.left, ColumnElement) or not binary.left.shares_lineage(id_column):
+            return
+        if not isinstance(binary.right, BindParameter):
+            return
+        value = binary.right.effective_value
+        if binary.operator == operators.eq:
+            values.append(value)
+        elif binary.operator == operators.in_op:
+            values.extend(value)
+
+    where = getattr(statement, "whereclause", None)
+    if where is not None:
+        visitors.traverse(where, {}, {"binary": visit_binary})
+    return values
+
+
+class CotaShardedSession(ShardedSession):
+    """
+    Sessão do SQLAlchemy que conhece o roteador de shards que a criou.
+    """
+
+    def __init__(self, router: "ShardRouter", **kwargs):
+        self.router = router
+        super().__init__(**kwargs)
+
+
+class ShardRouter:
+    """
+    Roteia as cotas para N bancos de dados (shards) a partir do ID da cota.
+
+    O ID é mapeado para um de NUM_BUCKETS buckets e o catálogo (no shard "0")
+    guarda a qual shard cada bucket pertence. Os IDs são globalmente únicos,
+    alocados em blocos a partir de um contador no catálogo. Modelos que não são
+    particionados declaram __shard_id__ e ficam sempre no shard informado, para
+    que a divisão de um shard não os deixe fora do shard de seus buckets.
+    """
+
+    def __init__(self, urls: list):
+        """
+        Inicializa o roteador e cria o catálogo caso ainda não exista.
+
+        Args:
+            urls (list): URLs dos shards iniciais; a primeira abriga o catálogo.
+        """
+        if not urls:
+            raise ValueError("É necessário informar ao menos um shard.")
+
+        self.catalog = make_engine(urls[0])
+        self._engines = {"0": self.catalog}
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._max_id = 0
+        self._bucket_map = {}
+        self._version = None
+        self._loaded_at = 0.0
+        self._bootstrap(urls)
+        self.reload()
+
+    # ------------------------------------------------------------------
+    # Catálogo
+    # ------------------------------------------------------------------
+    def _bootstrap(self, urls: list):
+        """
+        Cria as tabelas do catálogo e distribui os buckets entre os shards iniciais.
+        """
+        catalog_metadata.create_all(bind=self.catalog)
+        with self.catalog.begin() as conn:
+            if conn.execute(select(func.count()).select_from(shard_nodes)).scalar():
+                return
+            conn.execute(shard_nodes.insert(), [
+                {"shard_id": str(i), "url": url} for i, url in enumerate(urls)
+            ])
+            conn.execute(shard_buckets.insert(), [
+                {"bucket": b, "shard_id": str(b % len(urls))} for b in range(NUM_BUCKETS)
+            ])
+            conn.execute(shard_counters.insert(), [
+                {"name": "next_id", "value": 1},
+                {"name": "map_version", "value": 1},
+            ])
+
+    def reload(self):
+        """
+        Recarrega do catálogo a lista de shards e o mapa de buckets.
+        """
+        with self.catalog.connect() as conn:
+            nodes = conn.execute(select(shard_nodes)).all()
+            buckets = conn.execute(select(shard_buckets)).all()
+            version = conn.execute(
+                select(shard_counters.c.value).where(shard_counters.c.name == "map_version")
+            ).scalar()
+
+        with self._lock:
+            for node in nodes:
+                if node.shard_id not in self._engines:
+                    self._engines[node.shard_id] = make_engine(node.url)
+            self._bucket_map = {row.bucket: row.shard_id for row in buckets}
+            self._version = version
+            self._loaded_at = time.monotonic()
+
+    def _refresh_if_stale(self):
+        if time.monotonic() - self._loaded_at > MAP_TTL_SECONDS:
+            self.reload()
+
+    @property
+    def map_version(self) -> int:
+        return self._version
+
+    @property
+    def shards(self) -> dict:
+        """
+        Shards atualmente conhecidos (shard_id -> Engine).
+        """
+        self._refresh_if_stale()
+        return dict(self._engines)
+
+    def active_shards(self) -> list:
+        """
+        IDs dos shards que possuem ao menos um bucket, em ordem.
+        """
+        self._refresh_if_stale()
+        return sorted(set(self._bucket_map.values()), key=int)
+
+    def buckets_of(self, shard_id: str) -> list:
+        """
+        Buckets que pertencem a um shard, em ordem.
+        """
+        self._refresh_if_stale()
+        return sorted(b for b, owner in self._bucket_map.items() if owner == shard_id)
+
+    def shard_for_id(self, cota_id: int) -> str:
+        """
+        Retorna o shard dono de um ID de cota.
+
+        Args:
+            cota_id (int): ID da cota.
+
+        Returns:
+            str: ID do shard.
+        """
+        self._refresh_if_stale()
+        return self._bucket_map[bucket_for(cota_id)]
+
+    def next_id(self) -> int:
+        """
+        Gera um ID de cota globalmente único entre todos os shards e processos.
+
+        Returns:
+            int: Novo ID.
+        """
+        with self._lock:
+            if self._next_id >= self._max_id:
+                with self.catalog.begin() as conn:
+                    conn.execute(
+                        update(shard_counters)
+                        .where(shard_counters.c.name == "next_id")
+                        .values(value=shard_counters.c.value + ID_BLOCK_SIZE)
+                    )
+                    end = conn.execute(
+                        select(shard_counters.c.value).where(shard_counters.c.name == "next_id")
+                    ).scalar()
+                self._next_id, self._max_id = end - ID_BLOCK_SIZE, end
+            value = self._next_id
+            self._next_id += 1
+            return value
+
+    def create_all(self, metadata, id_table=None):
+        """
+        Cria as tabelas dos modelos em todos os shards.
+
+        Args:
+            metadata (MetaData): Metadados dos modelos (Base.metadata).
+            id_table (Table): Tabela cujos IDs existentes devem ser respeitados
+                pelo gerador de IDs (ex.: ao migrar de um banco único, cujas linhas
+                são depois levadas ao shard certo por rebalance.redistribute).
+        """
+        for engine in self.shards.values():
+            metadata.create_all(bind=engine)
+
+        if id_table is None:
+            return
+        max_id = max(self.fan_out(
+            lambda conn: conn.execute(select(func.max(id_table.c.id))).scalar() or 0
+        ))
+        with self.catalog.begin() as conn:
+            conn.execute(
+                update(shard_counters)
+                .where(shard_counters.c.name == "next_id", shard_counters.c.value <= max_id)
+                .values(value=max_id + 1)
+            )
+
+    # ------------------------------------------------------------------
+    # Sessão
+    # ------------------------------------------------------------------
+    def session(self, **kwargs) -> CotaShardedSession:
+        """
+        Cria uma sessão que roteia as operações para o shard correto.
+
+        Returns:
+            CotaShardedSession: Sessão compatível com as funções do CRUD.
+        """
+        kwargs.setdefault("autoflush", False)
+        return CotaShardedSession(
+            router=self,
+            shard_chooser=self._shard_chooser,
+            identity_chooser=self._identity_chooser,
+            execute_chooser=self._execute_chooser,
+            shards=self.shards,
+            **kwargs
+        )
+
+    def _shard_chooser(self, mapper, instance, clause=None, **kw):
+        # Modelos com __shard_id__ (ex.: carteiras) ficam sempre no mesmo shard
+        pinned = getattr(mapper.class_, "__shard_id__", None)
+        if pinned is not None:
+            return pinned
+        if instance is None:
+            return CATALOG_SHARD
+        # Modelos com __shard_key__ ficam no shard da cota referenciada (ex.: cota_id)
+        shard_key = getattr(mapper.class_, "__shard_key__", None)
+        if shard_key is not None:
+            return self.shard_for_id(getattr(instance, shard_key))
+        if getattr(instance, "id", None) is None:
+            instance.id = self.next_id()
+        return self.shard_for_id(instance.id)
+
+    def _identity_chooser(self, mapper, primary_key, **kw):
+        pinned = getattr(mapper.class_, "__shard_id__", None)
+        if pinned is not None:
+            return [pinned]
+        if hasattr(mapper.class_, "__shard_key__"):
+            return self.active_shards()
+        return [self.shard_for_id(primary_key[0])]
+
+    def _execute_chooser(self, orm_context):
+        mapper = orm_context.bind_mapper
+        if mapper is None:
+            return self.active_shards()
+        pinned = getattr(mapper.class_, "__shard_id__", None)
+        if pinned is not None:
+            return [pinned]
+        shard_key = getattr(mapper.class_, "__shard_key__", None)
+        column = mapper.columns[shard_key] if shard_key else mapper.primary_key[0]
+        ids = _id_comparisons(orm_context.statement, column)
+        if not ids:
+            return self.active_shards()
+        return sorted({self.shard_for_id(value) for value in ids}, key=int)
+
+    # ------------------------------------------------------------------
+    # Consultas distribuídas
+    # ------------------------------------------------------------------
+    def fan_out(self, fn, shard_ids=None) -> list:
+        """
+        Executa uma função em paralelo em cada shard.
+
+        Args:
+            fn (callable): Recebe uma Connection e retorna o resultado do shard.
+            shard_ids (list): Shards consultados (padrão: todos os ativos).
+
+        Returns:
+            list: Resultados na mesma ordem de shard_ids.
+        """
+        shard_ids = shard_ids or self.active_shards()
+        engines = self.shards
+
+        def run(shard_id):
+            with engines[shard_id].connect() as conn:
+                return fn(conn)
+
+        with ThreadPoolExecutor(max_workers=len(shard_ids)) as executor:
+            return list(executor.map(run, shard_ids))
+
+    def list_ordered(self, entity, skip: int = 0, limit: int = 100, where: list = None) -> list:
+        """
+        Lista objetos de todos os shards ordenados por ID, com paginação global.
+
+        Args:
+            entity: Modelo consultado (ex.: Cota).
+            skip (int): Número de registros a pular.
+            limit (int): Número máximo de registros a retornar.
+            where (list): Critérios de filtro aplicados em cada shard.
+
+        Returns:
+            list: Objetos (desanexados da sessão) mesclados em ordem crescente de ID.
+        """
+        # Cada shard precisa devolver skip + limit linhas para que a mesclagem seja correta
+        stmt = select(entity).where(*(where or [])).order_by(entity.id).limit(skip + limit)
+
+        def fetch(conn):
+            with Session(bind=conn) as session:
+                return session.scalars(stmt).all()
+
+        merged = heapq.merge(*self.fan_out(fetch), key=lambda obj: obj.id)
+        return [obj for i, obj in enumerate(merged) if skip <= i < skip + limit]
+
+    def aggregate(self, stmt) -> list:
+        """
+        Executa uma consulta de agregação em todos os shards.
+
+        Args:
+            stmt (Select): Consulta que retorna uma única linha por shard.
+
+        Returns:
+            list: Uma linha por shard, para ser combinada pelo chamador.
+        """
+        return self.fan_out(lambda conn: conn.execute(stmt).one())
+
+
+def get_router(db):
+    """
+    Retorna o roteador de shards da sessão, ou None se a sessão não for particionada.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+
+    Returns:
+        ShardRouter: Roteador associado à sessão, se houver.
+    """
+    return getattr(db, "router", None)
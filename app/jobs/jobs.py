@@ -0,0 +1,420 @@
+# Importações necessárias
+import csv
+import io
+import logging
+import multiprocessing
+import os
+from array import array
+from collections import deque
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from sqlalchemy import func, or_
+from app import money
+from app.crud import crud
+from app.database.database import SessionLocal
+from app.models.cota_model import Cota
+from app.models.job_model import Job
+
+logger = logging.getLogger(__name__)
+
+# Quantidade máxima de jobs executando ao mesmo tempo neste processo
+JOBS_MAX_CONCURRENT = int(os.getenv("JOBS_MAX_CONCURRENT", 2))
+# Tamanho máximo da fila de jobs pendentes
+JOBS_MAX_PENDING = int(os.getenv("JOBS_MAX_PENDING", 20))
+# Quantidade de processos usados nos cálculos
+JOBS_PROCESSES = int(os.getenv("JOBS_PROCESSES", os.cpu_count() or 1))
+# Quantidade de cotas enviadas a um processo por vez
+JOBS_CHUNK_SIZE = int(os.getenv("JOBS_CHUNK_SIZE", 1000))
+# Tempo (segundos) que o resultado de um job concluído fica disponível
+JOBS_RESULT_TTL_SECONDS = int(os.getenv("JOBS_RESULT_TTL_SECONDS", 24 * 3600))
+# Tempo (segundos) sem sinal de vida após o qual um job em execução é considerado interrompido
+JOBS_HEARTBEAT_TIMEOUT = int(os.getenv("JOBS_HEARTBEAT_TIMEOUT", 600))
+
+# Executor das threads que coordenam os jobs (limita a concorrência)
+_runner = ThreadPoolExecutor(max_workers=JOBS_MAX_CONCURRENT, thread_name_prefix="jobs")
+# Pool de processos criado sob demanda e compartilhado entre os jobs
+_process_pool = None
+_process_pool_lock = Lock()
+
+
+class JobCancelled(Exception):
+    """
+    Exceção usada para interromper um job cujo cancelamento foi solicitado.
+    """
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _get_process_pool():
+    """
+    Retorna o pool de processos, criando-o na primeira utilização.
+
+    Usa o método 'spawn' para não copiar as threads e conexões do servidor.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=JOBS_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+# ----------------------------------------------------------------------
+# Cálculos executados nos processos (recebem e devolvem apenas tuplas)
+# ----------------------------------------------------------------------
+def _valid_rows(rows: list) -> list:
+    # Descarta cotas com valores inválidos, como faz money.calculate_cota_values_cents
+    return [row for row in rows if row[1] > 0 and row[2] > 0 and row[3] > 0 and row[4] >= 0]
+
+
+def revalue_chunk(rows: list) -> list:
+    """
+    Recalcula os valores de um lote de cotas.
+
+    Args:
+        rows (list): Tuplas (id, amount_cents, interest_rate_bp, duration_months, tax_bp).
+
+    Returns:
+        list: Tuplas (id, gross_value_cents, net_value_cents, profitability_cents).
+    """
+    rows = _valid_rows(rows)
+    if not rows:
+        return []
+    ids, amounts, rates, durations, taxes = (array("q", column) for column in zip(*rows))
+    return list(zip(ids, *money.calculate_batch(amounts, rates, durations, taxes)))
+
+
+def simulate_chunk(rows: list, rates_bp: list, durations: list) -> dict:
+    """
+    Simula os valores de um lote de cotas para cada combinação de taxa e prazo.
+
+    Args:
+        rows (list): Tuplas (id, amount_cents, interest_rate_bp, duration_months, tax_bp).
+        rates_bp (list): Taxas de juros simuladas, em pontos-base.
+        durations (list): Prazos simulados, em meses.
+
+    Returns:
+        dict: (taxa, prazo) -> [soma dos valores brutos, soma dos valores líquidos], em centavos.
+    """
+    rows = _valid_rows(rows)
+    amounts = array("q", (row[1] for row in rows))
+    taxes = array("q", (row[4] for row in rows))
+    totals = {}
+    for rate in rates_bp:
+        for duration in durations:
+            gross_value, net_value, _ = money.calculate_batch(
+                amounts, repeat(rate, len(rows)), repeat(duration, len(rows)), taxes
+            )
+            totals[(rate, duration)] = [sum(gross_value), sum(net_value)]
+    return totals
+
+
+def export_chunk(rows: list) -> str:
+    """
+    Gera as linhas CSV de um lote de cotas com os valores calculados.
+
+    Args:
+        rows (list): Tuplas (id, amount_cents, interest_rate_bp, duration_months, tax_bp, name).
+
+    Returns:
+        str: Linhas CSV do lote, com os valores em decimal exato.
+    """
+    values = {row[0]: row[1:] for row in revalue_chunk([row[:5] for row in rows])}
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for cota_id, amount, rate, duration, tax, name in rows:
+        gross_value, net_value, profitability = values.get(cota_id, (None, None, None))
+        writer.writerow([
+            cota_id, name, money.format_cents(amount), money.format_fixed(rate, 2), duration,
+            money.format_fixed(tax, 4), money.format_cents(gross_value),
+            money.format_cents(net_value), money.format_cents(profitability),
+        ])
+    return buffer.getvalue()
+
+
+# ----------------------------------------------------------------------
+# Execução dos jobs
+# ----------------------------------------------------------------------
+def _iter_chunks(db, chunk_size: int):
+    """
+    Percorre todas as cotas em lotes ordenados por ID.
+
+    Yields:
+        list: Objetos Cota do lote.
+    """
+    last_id = 0
+    while True:
+        cotas = db.query(Cota).filter(Cota.id > last_id).order_by(Cota.id).limit(chunk_size).all()
+        # No modo particionado cada shard devolve o seu lote; mantém só os menores IDs
+        cotas = sorted(cotas, key=lambda cota: cota.id)[:chunk_size]
+        if not cotas:
+            return
+        yield cotas
+        last_id = cotas[-1].id
+
+
+def _map_chunks(db, job: Job, fn, to_row, *args):
+    """
+    Envia os lotes de cotas ao pool de processos e atualiza o progresso do job.
+
+    Mantém um número limitado de lotes em andamento e verifica o cancelamento
+    a cada lote concluído.
+
+    Args:
+        db (Session): Sessão do banco de dados.
+        job (Job): Job em execução.
+        fn (callable): Função executada no processo para cada lote.
+        to_row (callable): Converte uma Cota na tupla enviada ao processo.
+        *args: Argumentos adicionais repassados a fn.
+
+    Yields:
+        tuple: (cotas do lote, resultado de fn).
+    """
+    pool = _get_process_pool()
+    in_flight = deque()
+
+    def collect():
+        cotas, future = in_flight.popleft()
+        result = future.result()
+        job.processed += len(cotas)
+        job.progress = job.processed / job.total if job.total else 1.0
+        job.heartbeat_at = _now()
+        db.commit()
+        db.refresh(job)
+        if job.cancel_requested:
+            for _, pending in in_flight:
+                pending.cancel()
+            raise JobCancelled()
+        return cotas, result
+
+    for cotas in _iter_chunks(db, JOBS_CHUNK_SIZE):
+        rows = [to_row(cota) for cota in cotas]
+        in_flight.append((cotas, pool.submit(fn, rows, *args)))
+        if len(in_flight) >= 2 * JOBS_PROCESSES:
+            yield collect()
+    while in_flight:
+        yield collect()
+
+
+def _values_row(cota: Cota):
+    return (cota.id, cota.amount_cents, cota.interest_rate_bp, cota.duration_months, cota.tax_bp)
+
+
+def _export_row(cota: Cota):
+    return (*_values_row(cota), cota.name)
+
+
+def run_revaluation(db, job: Job) -> dict:
+    """
+    Recalcula e grava os valores bruto, líquido e a rentabilidade de todas as cotas.
+
+    Os lotes são calculados a partir de cotas lidas antes, sem bloqueio; por isso,
+    antes de gravar, as cotas do lote são relidas com bloqueio e as que tiveram valor,
+    taxa, prazo ou imposto alterados nesse meio tempo são ignoradas (a alteração
+    feita pelo CRUD já recalculou os seus valores).
+    """
+    updated = 0
+    skipped = 0
+    for cotas, values in _map_chunks(db, job, revalue_chunk, _values_row):
+        # Valores usados no cálculo, guardados antes de a releitura atualizar os objetos
+        inputs = {cota.id: _values_row(cota) for cota in cotas}
+        results = {cota_id: result for cota_id, *result in values}
+        if not results:
+            continue
+        locked = (
+            db.query(Cota)
+            .filter(Cota.id.in_(list(results)))
+            .with_for_update()
+            .populate_existing()
+            .all()
+        )
+        for cota in locked:
+            gross_value, net_value, profitability = results[cota.id]
+            if _values_row(cota) != inputs[cota.id]:
+                skipped += 1
+                continue
+            current = (cota.gross_value_cents, cota.net_value_cents, cota.profitability_cents)
+            if current == (gross_value, net_value, profitability):
+                continue
+            before = crud.portfolio_contribution(cota)
+            cota.gross_value_cents = gross_value
+            cota.net_value_cents = net_value
+            cota.profitability_cents = profitability
+            crud.record_change(db, cota, "update")
+            crud.update_portfolio_rollups(db, cota, before, crud.portfolio_contribution(cota))
+            updated += 1
+        db.commit()
+    return {"updated": updated, "skipped": skipped}
+
+
+def run_simulation(db, job: Job) -> dict:
+    """
+    Simula os totais das cotas para uma grade de taxas de juros e prazos.
+    """
+    params = job.params or {}
+    rates_bp = [money.percent_to_bp(rate) for rate in params.get("interest_rates", [])]
+    durations = [int(duration) for duration in params.get("durations", [])]
+    if not rates_bp or not durations:
+        raise ValueError("Informe 'interest_rates' e 'durations' para a simulação.")
+
+    totals = {}
+    for _, partial in _map_chunks(db, job, simulate_chunk, _values_row, rates_bp, durations):
+        for key, (gross_value, net_value) in partial.items():
+            total = totals.setdefault(key, [0, 0])
+            total[0] += gross_value
+            total[1] += net_value
+
+    return {"grid": [
+        {
+            "interest_rate": money.bp_to_percent(rate),
+            "duration_months": duration,
+            "total_gross_value": money.from_cents(totals.get((rate, duration), [0, 0])[0]),
+            "total_net_value": money.from_cents(totals.get((rate, duration), [0, 0])[1]),
+        }
+        for rate in rates_bp for duration in durations
+    ]}
+
+
+def run_export(db, job: Job) -> dict:
+    """
+    Exporta todas as cotas, com os valores calculados, em formato CSV.
+    """
+    header = "id,name,amount,interest_rate,duration_months,tax,gross_value,net_value,profitability\r\n"
+    parts = [header]
+    for _, lines in _map_chunks(db, job, export_chunk, _export_row):
+        parts.append(lines)
+    return {"format": "csv", "content": "".join(parts)}
+
+
+TASKS = {
+    "revaluation": run_revaluation,
+    "simulation": run_simulation,
+    "export": run_export,
+}
+
+
+def run_job(job_id: int):
+    """
+    Executa um job pendente, registrando status, progresso e resultado no banco.
+
+    Args:
+        job_id (int): ID do job.
+    """
+    db = SessionLocal()
+    # Evita recarregar cada cota do lote após os commits de progresso
+    db.expire_on_commit = False
+    try:
+        # Reivindica o job em uma única atualização condicional: só um worker o executa
+        # e um cancelamento gravado depois da leitura não é sobrescrito
+        now = _now()
+        claimed = (
+            db.query(Job)
+            .filter(Job.id == job_id, Job.status == "pending")
+            .update({"status": "running", "started_at": now, "heartbeat_at": now}, synchronize_session=False)
+        )
+        db.commit()
+        if not claimed:
+            return
+
+        job = crud.get_job(db, job_id)
+        job.total = sum(row[0] for row in db.query(func.count(Cota.id)).all())
+        db.commit()
+
+        try:
+            result = TASKS[job.kind](db, job)
+        except JobCancelled:
+            db.rollback()
+            job.status = "cancelled"
+        except Exception as e:
+            logger.error(f"Erro ao executar o job {job_id}: {e}")
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+        else:
+            job.status = "succeeded"
+            job.result = result
+            job.progress = 1.0
+            job.expires_at = _now() + timedelta(seconds=JOBS_RESULT_TTL_SECONDS)
+
+        job.finished_at = _now()
+        db.commit()
+    finally:
+        db.close()
+
+
+def submit_job(job_id: int):
+    """
+    Agenda a execução de um job nas threads de jobs.
+
+    Args:
+        job_id (int): ID do job.
+    """
+    return _runner.submit(run_job, job_id)
+
+
+def fail_stale_jobs() -> int:
+    """
+    Marca como falhos os jobs em execução sem sinal de vida há mais de JOBS_HEARTBEAT_TIMEOUT segundos.
+
+    Os jobs em execução em outros workers ativos atualizam 'heartbeat_at' a cada lote
+    e não são afetados.
+
+    Returns:
+        int: Quantidade de jobs marcados como falhos.
+    """
+    now = _now()
+    cutoff = now - timedelta(seconds=JOBS_HEARTBEAT_TIMEOUT)
+    db = SessionLocal()
+    try:
+        failed = (
+            db.query(Job)
+            .filter(Job.status == "running", or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < cutoff))
+            .update({
+                "status": "failed",
+                "error": "Job interrompido: o worker deixou de responder.",
+                "finished_at": now,
+            }, synchronize_session=False)
+        )
+        db.commit()
+    finally:
+        db.close()
+    if failed:
+        logger.warning(f"{failed} jobs interrompidos marcados como falhos.")
+    return failed
+
+
+def recover_jobs():
+    """
+    Trata os jobs deixados por uma execução anterior da aplicação.
+
+    Jobs em execução sem sinal de vida são marcados como falhos (ver fail_stale_jobs)
+    e os pendentes são agendados novamente; se outro worker já os tiver iniciado, a
+    reivindicação em run_job não os executa de novo.
+    """
+    fail_stale_jobs()
+    db = SessionLocal()
+    try:
+        pending = [row[0] for row in db.query(Job.id).filter(Job.status == "pending").all()]
+    finally:
+        db.close()
+
+    for job_id in sorted(pending):
+        submit_job(job_id)
+
+
+def expire_jobs_once():
+    """
+    Descarta os resultados de jobs expirados.
+    """
+    db = SessionLocal()
+    try:
+        expired = crud.expire_jobs(db)
+        if expired:
+            logger.info(f"{expired} resultados de jobs expirados foram descartados.")
+    finally:
+        db.close()
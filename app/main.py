@@ -1,9 +1,121 @@
 # Importando FastAPI e as rotas de cotas
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
 from app.api.routes.cotas_routes import router as cotas_router
+from app.api.routes.jobs_routes import router as jobs_router
+from app.api.routes.portfolios_routes import router as portfolios_router
+from app.api.admission import AdmissionController, AdmissionMiddleware, RouteClass
+from app.crud import crud
+from app.database.database import Base, SessionLocal, engine, shard_router
+from app.database.migrations import (
+    add_cota_portfolio_column, add_job_heartbeat_column, migrate_cotas_to_fixed_point
+)
+from app.database.rebalance import redistribute
+from app.jobs import jobs
+from app.models.cota_model import Cota
+
+logger = logging.getLogger(__name__)
+
+# Retenção dos eventos do feed de alterações (padrão: 7 dias) e intervalo da compactação
+CHANGES_RETENTION_SECONDS = int(os.getenv("CHANGES_RETENTION_SECONDS", 7 * 24 * 3600))
+CHANGES_COMPACT_INTERVAL = int(os.getenv("CHANGES_COMPACT_INTERVAL", 3600))
+# Intervalo (segundos) entre as verificações de resultados de jobs expirados e de jobs interrompidos
+JOBS_EXPIRE_INTERVAL = int(os.getenv("JOBS_EXPIRE_INTERVAL", 300))
+# Intervalo (segundos) entre as reconciliações do contador de cotas com a tabela
+COUNTERS_RECONCILE_INTERVAL = int(os.getenv("COUNTERS_RECONCILE_INTERVAL", 3600))
+
+# Controle de admissão: vagas totais (em geral, o tamanho do pool de threads) e cotas por cliente
+ADMISSION_GLOBAL_LIMIT = int(os.getenv("ADMISSION_GLOBAL_LIMIT", 40))
+ADMISSION_CLIENT_RATE = float(os.getenv("ADMISSION_CLIENT_RATE", 0))
+ADMISSION_CLIENT_BURST = float(os.getenv("ADMISSION_CLIENT_BURST", 0))
+
+# Cria as tabelas que ainda não existem (ex.: feed de alterações) e migra as cotas em float
+if shard_router is not None:
+    # O gerador de IDs continua a partir do maior ID existente, mesmo sem rodar o create_db antes
+    shard_router.create_all(Base.metadata, id_table=Cota.__table__)
+    for shard_engine in shard_router.shards.values():
+        migrate_cotas_to_fixed_point(shard_engine)
+        add_cota_portfolio_column(shard_engine)
+        add_job_heartbeat_column(shard_engine)
+    # Cotas de um banco único usado como primeiro shard vão para o shard dono do seu bucket
+    if redistribute(shard_router, Cota.__table__, fence=crud.record_moves):
+        startup_db = shard_router.session()
+        try:
+            crud.reconcile_cota_counter(startup_db)
+            crud.rebuild_portfolio_rollups(startup_db)
+        finally:
+            startup_db.close()
+else:
+    Base.metadata.create_all(bind=engine)
+    migrate_cotas_to_fixed_point(engine)
+    add_cota_portfolio_column(engine)
+    add_job_heartbeat_column(engine)
+
+
+def compact_changes_once():
+    """
+    Executa uma rodada da compactação do feed de alterações.
+    """
+    db = SessionLocal()
+    try:
+        removed = crud.compact_changes(db, CHANGES_RETENTION_SECONDS)
+        if removed:
+            logger.info(f"{removed} eventos antigos removidos do feed de alterações.")
+    finally:
+        db.close()
+
+
+def reconcile_counters_once():
+    """
+    Executa uma rodada da reconciliação do contador de cotas.
+    """
+    db = SessionLocal()
+    try:
+        drift = crud.reconcile_cota_counter(db)
+        if drift:
+            logger.warning(f"Contador de cotas corrigido em {drift} cotas.")
+    finally:
+        db.close()
+
+
+async def run_periodically(task, interval: int):
+    """
+    Executa uma tarefa de manutenção (síncrona) periodicamente, fora do event loop.
+
+    Args:
+        task (callable): Tarefa a ser executada.
+        interval (int): Intervalo entre as execuções, em segundos.
+    """
+    while True:
+        try:
+            await run_in_threadpool(task)
+        except Exception as e:
+            logger.error(f"Erro na tarefa periódica '{task.__name__}': {e}")
+        await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Inicia as tarefas em segundo plano da aplicação e as encerra no desligamento.
+    """
+    await run_in_threadpool(jobs.recover_jobs)
+    tasks = [
+        asyncio.create_task(run_periodically(compact_changes_once, CHANGES_COMPACT_INTERVAL)),
+        asyncio.create_task(run_periodically(jobs.expire_jobs_once, JOBS_EXPIRE_INTERVAL)),
+        asyncio.create_task(run_periodically(jobs.fail_stale_jobs, JOBS_EXPIRE_INTERVAL)),
+        asyncio.create_task(run_periodically(reconcile_counters_once, COUNTERS_RECONCILE_INTERVAL)),
+    ]
+    yield
+    for task in tasks:
+        task.cancel()
 
 
 # Cria aplicação FastAPI com título, descrição e versão
@@ -11,6 +123,7 @@ app = FastAPI(
     title="API de Cotas",
     description="API para gerenciamento de cotas de investimentos",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
@@ -48,9 +161,11 @@ async def http_exception_handler(request: Request, exc: HTTPException):
     Returns:
         JSONResponse: Resposta com detalhes do erro.
     """
+    # Um detalhe em dicionário já traz a chave 'detalhe' e campos adicionais (ex.: cursores do feed)
     return JSONResponse(
         status_code=exc.status_code,
-        content={"detalhe": exc.detail},
+        content=exc.detail if isinstance(exc.detail, dict) else {"detalhe": exc.detail},
+        headers=exc.headers,
     )
 
 
@@ -94,5 +209,44 @@ async def generic_exception_handler(request: Request, exc: Exception):
     )
 
 
-# Adiciona as rotas de cotas à aplicação
+# Controle de admissão: leituras pontuais têm prioridade sobre listagens, escritas e jobs
+admission = AdmissionController(
+    classes=[
+        RouteClass("read", max_concurrent=32, max_queue=64, queue_timeout=2.0, priority=0, cost=1),
+        RouteClass("list", max_concurrent=8, max_queue=32, queue_timeout=2.0, priority=1, cost=2),
+        RouteClass("write", max_concurrent=8, max_queue=32, queue_timeout=5.0, priority=1, cost=1),
+        RouteClass("bulk", max_concurrent=2, max_queue=8, queue_timeout=5.0, priority=2, cost=10),
+    ],
+    rules=[
+        # O feed de alterações é assíncrono e não ocupa threads durante a espera
+        (["GET"], r"/cotas/changes", None),
+        (["GET"], r"/cotas/?", "list"),
+        (["GET"], r"/cotas/summary", "list"),
+        (["GET"], r"/jobs/\d+/result", "bulk"),
+        (["GET"], r"/(cotas|jobs|portfolios)/.+", "read"),
+        (["POST"], r"/jobs/?", "bulk"),
+        (["POST"], r"/portfolios/rebuild", "bulk"),
+        (["POST", "PUT", "DELETE"], r"/(cotas|jobs|portfolios)(/.*)?", "write"),
+    ],
+    global_limit=ADMISSION_GLOBAL_LIMIT,
+    client_rate=ADMISSION_CLIENT_RATE,
+    client_burst=ADMISSION_CLIENT_BURST,
+)
+app.add_middleware(AdmissionMiddleware, controller=admission)
+
+
+@app.get("/metrics/admission", tags=["Métricas"])
+async def admission_metrics():
+    """
+    Métricas do controle de admissão: requisições em execução, filas e rejeições.
+
+    Returns:
+        dict: Métricas globais e por classe de rota.
+    """
+    return admission.snapshot()
+
+
+# Adiciona as rotas de cotas, de jobs e de carteiras à aplicação
 app.include_router(cotas_router, prefix="/cotas", tags=["Cotas"])
+app.include_router(jobs_router, prefix="/jobs", tags=["Jobs"])
+app.include_router(portfolios_router, prefix="/portfolios", tags=["Carteiras"])
@@ -1 +1,5 @@
 from .cota_model import Cota
+from .change_model import CotaChange
+from .job_model import Job
+from .counter_model import RowCounter
+from .portfolio_model import Portfolio, PortfolioRollup
@@ -0,0 +1,34 @@
+# Importações de módulos necessários
+from sqlalchemy import Column, Integer, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+
+# Classe de modelo do feed de alterações das cotas (outbox)
+class CotaChange(Base):
+    """
+    Modelo da tabela 'cota_changes' (eventos de alteração de cotas).
+
+    Cada criação, atualização ou exclusão de cota grava um evento nesta tabela
+    na mesma transação da alteração, em ordem crescente de 'seq'. O número de
+    sequência vem de um contador bloqueado até o commit (ver crud.record_change),
+    para que a ordem de 'seq' seja também a ordem de confirmação das transações.
+
+    Atributos:
+        - seq (int): Número de sequência do evento (chave primária).
+        - cota_id (int): ID da cota alterada.
+        - operation (str): Tipo de alteração ('create', 'update', 'delete' ou 'move', na divisão de shards).
+        - payload (dict): Estado da cota após a alteração (vazio na exclusão).
+        - created_at (datetime): Data do evento (preenchida automaticamente).
+    """
+    __tablename__ = "cota_changes"
+    # Evita que o SQLite reutilize números de sequência após a compactação
+    __table_args__ = {"sqlite_autoincrement": True}
+    # No modo particionado, o evento fica no mesmo shard da cota
+    __shard_key__ = "cota_id"
+
+    seq = Column(Integer, primary_key=True, autoincrement=True)
+    cota_id = Column(Integer, nullable=False, index=True)
+    operation = Column(String, nullable=False)
+    payload = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=func.now(), index=True)
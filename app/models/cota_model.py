@@ -1,7 +1,9 @@
 # Importações de módulos necessários
-from sqlalchemy import Column, Integer, Float, String, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.sql import func
 from app.database.database import Base
+from app import money
 
 
 # Classe de modelo de cotas de investimento
@@ -9,27 +11,74 @@ class Cota(Base):
     """
     Modelo da tabela 'cota' (cotas de investimento).
 
+    Os valores monetários são armazenados em centavos e as taxas em pontos-base
+    (inteiros), para que os cálculos sejam exatos. Os atributos em float
+    (amount, interest_rate, tax, ...) convertem de e para essas colunas.
+
     Atributos:
         - id (int): Chave primária.
         - name (str): Nome da cota.
-        - amount (float): Valor investido.
-        - interest_rate (float): Rentabilidade (% ao mês).
+        - amount_cents (int): Valor investido, em centavos.
+        - interest_rate_bp (int): Rentabilidade (pontos-base ao mês).
         - duration_months (int): Prazo (meses).
-        - tax (float): Imposto fixo (15% por padrão).
-        - gross_value (float): Valor bruto do investimento.
-        - net_value (float): Valor líquido do investimento.
-        - profitability (float): Rentabilidade do investimento.
+        - tax_bp (int): Imposto fixo, em pontos-base (1500, ou 15%, por padrão).
+        - gross_value_cents (int): Valor bruto do investimento, em centavos.
+        - net_value_cents (int): Valor líquido do investimento, em centavos.
+        - profitability_cents (int): Rentabilidade do investimento, em centavos.
         - created_at (datetime): Data de criação (preenchida automaticamente).
+        - portfolio_id (int): ID da carteira da cota (opcional).
     """
     __tablename__ = "cotas"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String, nullable=False)
-    amount = Column(Float, nullable=False)
-    interest_rate = Column(Float, nullable=False)
+    amount_cents = Column(BigInteger, nullable=False)
+    interest_rate_bp = Column(Integer, nullable=False)
     duration_months = Column(Integer, nullable=False)
-    tax = Column(Float, default=0.15)
-    gross_value = Column(Float, nullable=True)
-    net_value = Column(Float, nullable=True)
-    profitability = Column(Float, nullable=True)
+    tax_bp = Column(Integer, default=money.DEFAULT_TAX_BP)
+    gross_value_cents = Column(BigInteger, nullable=True)
+    net_value_cents = Column(BigInteger, nullable=True)
+    profitability_cents = Column(BigInteger, nullable=True)
     created_at = Column(DateTime, default=func.now())
+    # Sem chave estrangeira: no modo particionado a carteira pode estar em outro shard
+    portfolio_id = Column(Integer, nullable=True, index=True)
+
+    # Valor investido (float)
+    @hybrid_property
+    def amount(self):
+        return money.from_cents(self.amount_cents)
+
+    @amount.setter
+    def amount(self, value):
+        self.amount_cents = money.to_cents(value)
+
+    # Rentabilidade em % ao mês (float)
+    @hybrid_property
+    def interest_rate(self):
+        return money.bp_to_percent(self.interest_rate_bp)
+
+    @interest_rate.setter
+    def interest_rate(self, value):
+        self.interest_rate_bp = money.percent_to_bp(value)
+
+    # Imposto como fração (float)
+    @hybrid_property
+    def tax(self):
+        return money.bp_to_fraction(self.tax_bp)
+
+    @tax.setter
+    def tax(self, value):
+        self.tax_bp = money.fraction_to_bp(value)
+
+    # Valores calculados (float, somente leitura)
+    @hybrid_property
+    def gross_value(self):
+        return money.from_cents(self.gross_value_cents)
+
+    @hybrid_property
+    def net_value(self):
+        return money.from_cents(self.net_value_cents)
+
+    @hybrid_property
+    def profitability(self):
+        return money.from_cents(self.profitability_cents)
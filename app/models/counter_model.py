@@ -0,0 +1,26 @@
+# Importações de módulos necessários
+from sqlalchemy import Column, String, BigInteger, DateTime
+from sqlalchemy.sql import func
+from app.database.database import Base
+
+
+# Classe de modelo dos contadores de linhas
+class RowCounter(Base):
+    """
+    Modelo da tabela 'row_counters' (contadores mantidos pela aplicação).
+
+    O contador 'cotas' é atualizado na mesma transação das inserções e exclusões,
+    para que o total de linhas seja lido sem executar 'SELECT COUNT(*)'; o contador
+    'cota_changes' guarda o último número de sequência do feed de alterações.
+    No modo particionado, cada shard mantém os contadores das suas próprias linhas.
+
+    Atributos:
+        - name (str): Nome do contador (chave primária).
+        - value (int): Valor atual.
+        - updated_at (datetime): Data da última alteração (preenchida automaticamente).
+    """
+    __tablename__ = "row_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
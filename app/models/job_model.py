@@ -0,0 +1,49 @@
+# Importações de módulos necessários
+from sqlalchemy import Column, Integer, Float, String, DateTime, Boolean, JSON
+from sqlalchemy.sql import func
+from app.database.database import Base
+from app.database.sharding import CATALOG_SHARD
+
+
+# Classe de modelo dos jobs em segundo plano
+class Job(Base):
+    """
+    Modelo da tabela 'jobs' (processamentos pesados executados em segundo plano).
+
+    No modo particionado, os jobs ficam todos no shard do catálogo.
+
+    Atributos:
+        - id (int): Chave primária.
+        - kind (str): Tipo do job ('revaluation', 'simulation' ou 'export').
+        - status (str): 'pending', 'running', 'succeeded', 'failed', 'cancelled' ou 'expired'.
+        - params (dict): Parâmetros informados na criação do job.
+        - progress (float): Fração concluída, entre 0 e 1.
+        - processed (int): Quantidade de cotas já processadas.
+        - total (int): Quantidade de cotas a processar.
+        - cancel_requested (bool): Indica que o cancelamento foi solicitado.
+        - result (dict): Resultado do job (removido após a expiração).
+        - error (str): Mensagem de erro, em caso de falha.
+        - created_at (datetime): Data de criação (preenchida automaticamente).
+        - started_at (datetime): Início da execução.
+        - finished_at (datetime): Fim da execução.
+        - heartbeat_at (datetime): Último sinal de vida do worker que executa o job.
+        - expires_at (datetime): Data a partir da qual o resultado é descartado.
+    """
+    __tablename__ = "jobs"
+    __shard_id__ = CATALOG_SHARD
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending", index=True)
+    params = Column(JSON, nullable=True)
+    progress = Column(Float, nullable=False, default=0.0)
+    processed = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=True)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    result = Column(JSON, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True, index=True)
@@ -0,0 +1,96 @@
+# Importações de módulos necessários
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.database.database import Base
+from app.database.sharding import CATALOG_SHARD
+
+# Faixas de prazo da distribuição de vencimentos: (prazo máximo em meses, coluna, rótulo)
+MATURITY_BUCKETS = (
+    (6, "maturity_6m_cents", "up_to_6_months"),
+    (12, "maturity_12m_cents", "7_to_12_months"),
+    (24, "maturity_24m_cents", "13_to_24_months"),
+    (60, "maturity_60m_cents", "25_to_60_months"),
+    (None, "maturity_over_60m_cents", "over_60_months"),
+)
+
+# Colunas acumuladas de 'portfolio_rollups', na ordem usada pelo CRUD
+ROLLUP_COLUMNS = (
+    "cota_count",
+    "amount_cents",
+    "gross_value_cents",
+    "net_value_cents",
+    "rate_weight",
+    *(column for _, column, _ in MATURITY_BUCKETS),
+)
+
+
+def maturity_column(duration_months: int) -> str:
+    """
+    Retorna a coluna da faixa de vencimento correspondente a um prazo.
+
+    Args:
+        duration_months (int): Prazo da cota, em meses.
+
+    Returns:
+        str: Nome da coluna em 'portfolio_rollups'.
+    """
+    for max_months, column, _ in MATURITY_BUCKETS:
+        if max_months is None or duration_months <= max_months:
+            return column
+
+
+# Classe de modelo das carteiras de cotas
+class Portfolio(Base):
+    """
+    Modelo da tabela 'portfolios' (carteiras de cotas de um cliente).
+
+    No modo particionado, as carteiras ficam todas no shard do catálogo.
+
+    Atributos:
+        - id (int): Chave primária.
+        - name (str): Nome da carteira.
+        - created_at (datetime): Data de criação (preenchida automaticamente).
+    """
+    __tablename__ = "portfolios"
+    __shard_id__ = CATALOG_SHARD
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    name = Column(String, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+
+# Classe de modelo dos totais acumulados das carteiras
+class PortfolioRollup(Base):
+    """
+    Modelo da tabela 'portfolio_rollups' (totais acumulados de cada carteira).
+
+    Os totais são atualizados com deltas na mesma transação em que uma cota da
+    carteira é criada, atualizada ou deletada, para que o resumo da carteira seja
+    lido sem carregar as suas cotas. No modo particionado, cada shard acumula
+    apenas as cotas que guarda, e o resumo soma uma linha por shard.
+
+    Atributos:
+        - portfolio_id (int): ID da carteira (chave primária).
+        - cota_count (int): Quantidade de cotas.
+        - amount_cents (int): Soma dos valores investidos, em centavos.
+        - gross_value_cents (int): Soma dos valores brutos, em centavos.
+        - net_value_cents (int): Soma dos valores líquidos, em centavos.
+        - rate_weight (int): Soma de valor investido (centavos) x taxa (pontos-base),
+          usada na taxa média ponderada.
+        - maturity_*_cents (int): Valor investido em cada faixa de prazo (MATURITY_BUCKETS).
+        - updated_at (datetime): Data da última alteração (preenchida automaticamente).
+    """
+    __tablename__ = "portfolio_rollups"
+
+    portfolio_id = Column(Integer, primary_key=True)
+    cota_count = Column(BigInteger, nullable=False, default=0)
+    amount_cents = Column(BigInteger, nullable=False, default=0)
+    gross_value_cents = Column(BigInteger, nullable=False, default=0)
+    net_value_cents = Column(BigInteger, nullable=False, default=0)
+    rate_weight = Column(BigInteger, nullable=False, default=0)
+    maturity_6m_cents = Column(BigInteger, nullable=False, default=0)
+    maturity_12m_cents = Column(BigInteger, nullable=False, default=0)
+    maturity_24m_cents = Column(BigInteger, nullable=False, default=0)
+    maturity_60m_cents = Column(BigInteger, nullable=False, default=0)
+    maturity_over_60m_cents = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -0,0 +1,209 @@
+# Aritmética monetária exata em ponto fixo: centavos e pontos-base (basis points) inteiros
+from array import array
+from decimal import (
+    Decimal, ROUND_CEILING, ROUND_DOWN, ROUND_FLOOR, ROUND_HALF_DOWN, ROUND_HALF_EVEN,
+    ROUND_HALF_UP, ROUND_UP
+)
+
+# Centavos em uma unidade monetária
+CENTS = 100
+# Pontos-base em 100% (1% = 100 pontos-base)
+BASIS_POINTS = 10_000
+# Imposto padrão sobre a rentabilidade (15%), em pontos-base
+DEFAULT_TAX_BP = 1_500
+# Modo de arredondamento padrão (arredondamento bancário)
+DEFAULT_ROUNDING = ROUND_HALF_EVEN
+
+ROUNDING_MODES = (
+    ROUND_HALF_EVEN, ROUND_HALF_UP, ROUND_HALF_DOWN, ROUND_DOWN, ROUND_UP, ROUND_FLOOR, ROUND_CEILING
+)
+
+
+def div_round(numerator: int, denominator: int, rounding: str = DEFAULT_ROUNDING) -> int:
+    """
+    Divide dois inteiros arredondando o quociente conforme o modo informado.
+
+    Args:
+        numerator (int): Dividendo.
+        denominator (int): Divisor (positivo).
+        rounding (str): Modo de arredondamento do módulo decimal (ex.: ROUND_HALF_EVEN).
+
+    Returns:
+        int: Quociente arredondado.
+    """
+    quotient, remainder = divmod(numerator, denominator)
+    if remainder == 0 or rounding == ROUND_FLOOR:
+        return quotient
+    if rounding == ROUND_CEILING:
+        return quotient + 1
+    if rounding == ROUND_DOWN:
+        return quotient if numerator >= 0 else quotient + 1
+    if rounding == ROUND_UP:
+        return quotient + 1 if numerator >= 0 else quotient
+
+    twice = 2 * remainder
+    if twice != denominator:
+        return quotient + 1 if twice > denominator else quotient
+    # Empate exato entre dois inteiros
+    if rounding == ROUND_HALF_EVEN:
+        return quotient + (quotient & 1)
+    if rounding == ROUND_HALF_UP:
+        return quotient + 1 if numerator >= 0 else quotient
+    if rounding == ROUND_HALF_DOWN:
+        return quotient if numerator >= 0 else quotient + 1
+    raise ValueError(f"Modo de arredondamento não suportado: {rounding}")
+
+
+def _quantize(value, scale: int, rounding: str) -> int:
+    return int((Decimal(str(value)) * scale).quantize(Decimal(1), rounding=rounding))
+
+
+def to_cents(value, rounding: str = DEFAULT_ROUNDING) -> int:
+    """
+    Converte um valor monetário (float, str ou Decimal) para centavos inteiros.
+    """
+    return _quantize(value, CENTS, rounding)
+
+
+def from_cents(cents):
+    """
+    Converte centavos inteiros para float (o float mais próximo do valor decimal exato).
+    """
+    return None if cents is None else cents / CENTS
+
+
+def format_fixed(value, digits: int) -> str:
+    """
+    Formata um inteiro em ponto fixo como texto decimal exato (ex.: 123456, 2 -> '1234.56').
+    """
+    if value is None:
+        return ""
+    sign = "-" if value < 0 else ""
+    units, rest = divmod(abs(value), 10 ** digits)
+    return f"{sign}{units}.{rest:0{digits}d}"
+
+
+def format_cents(cents) -> str:
+    """
+    Formata centavos inteiros como texto decimal exato (ex.: 123456 -> '1234.56').
+    """
+    return format_fixed(cents, 2)
+
+
+def percent_to_bp(percent, rounding: str = DEFAULT_ROUNDING) -> int:
+    """
+    Converte uma taxa em porcentagem (ex.: 1.5 para 1,5%) para pontos-base (150).
+    """
+    return _quantize(percent, BASIS_POINTS // 100, rounding)
+
+
+def bp_to_percent(bp):
+    """
+    Converte pontos-base para taxa em porcentagem.
+    """
+    return None if bp is None else bp / (BASIS_POINTS // 100)
+
+
+def fraction_to_bp(fraction, rounding: str = DEFAULT_ROUNDING) -> int:
+    """
+    Converte uma fração (ex.: 0.15 para 15%) para pontos-base (1500).
+    """
+    return _quantize(fraction, BASIS_POINTS, rounding)
+
+
+def bp_to_fraction(bp):
+    """
+    Converte pontos-base para fração.
+    """
+    return None if bp is None else bp / BASIS_POINTS
+
+
+def calculate_cota_values_cents(amount_cents: int, rate_bp: int, duration: int, tax_bp: int,
+                                rounding: str = DEFAULT_ROUNDING):
+    """
+    Calcula os valores bruto, líquido e a rentabilidade de uma cota em centavos (juros simples).
+
+    A rentabilidade e o imposto são arredondados uma única vez cada, para o centavo,
+    conforme o modo de arredondamento.
+
+    Args:
+        amount_cents (int): Valor inicial em centavos.
+        rate_bp (int): Taxa de juros mensal em pontos-base.
+        duration (int): Duração em meses.
+        tax_bp (int): Imposto sobre a rentabilidade em pontos-base.
+        rounding (str): Modo de arredondamento.
+
+    Returns:
+        tuple: Valores bruto, líquido e rentabilidade, em centavos.
+    """
+    if amount_cents <= 0 or rate_bp <= 0 or duration <= 0 or tax_bp < 0:
+        raise ValueError("Todos os valores devem ser positivos e a taxa não pode ser negativa.")
+
+    profitability = div_round(amount_cents * rate_bp * duration, BASIS_POINTS, rounding)
+    gross_value = amount_cents + profitability
+    net_value = gross_value - div_round(profitability * tax_bp, BASIS_POINTS, rounding)
+    return gross_value, net_value, profitability
+
+
+# Deslocamento somado ao numerador antes da divisão inteira, por modo de arredondamento
+# (válido para numeradores não negativos)
+_BATCH_OFFSETS = {
+    ROUND_FLOOR: 0,
+    ROUND_DOWN: 0,
+    ROUND_CEILING: BASIS_POINTS - 1,
+    ROUND_UP: BASIS_POINTS - 1,
+    ROUND_HALF_UP: BASIS_POINTS // 2,
+    ROUND_HALF_DOWN: BASIS_POINTS // 2 - 1,
+    ROUND_HALF_EVEN: BASIS_POINTS // 2,
+}
+
+
+def calculate_batch(amounts_cents, rates_bp, durations, taxes_bp, rounding: str = DEFAULT_ROUNDING):
+    """
+    Calcula os valores de um lote de cotas com aritmética inteira sobre arrays.
+
+    Os argumentos são sequências de mesmo tamanho (ex.: array('q')) com valores
+    válidos (não negativos), como exigido por calculate_cota_values_cents. Cada
+    arredondamento é feito com uma única divisão inteira, sem chamada de função
+    por elemento, o que mantém o lote próximo da velocidade do cálculo em float.
+
+    Args:
+        amounts_cents: Valores iniciais em centavos.
+        rates_bp: Taxas de juros mensais em pontos-base.
+        durations: Durações em meses.
+        taxes_bp: Impostos em pontos-base.
+        rounding (str): Modo de arredondamento.
+
+    Returns:
+        tuple: Arrays de valores brutos, líquidos e rentabilidades, em centavos.
+    """
+    if rounding not in _BATCH_OFFSETS:
+        raise ValueError(f"Modo de arredondamento não suportado: {rounding}")
+
+    gross_value, net_value, profitability = array("q"), array("q"), array("q")
+    add_gross, add_net, add_profit = gross_value.append, net_value.append, profitability.append
+    rows = zip(amounts_cents, rates_bp, durations, taxes_bp)
+    offset = _BATCH_OFFSETS[rounding]
+    half = BASIS_POINTS // 2
+
+    if rounding == ROUND_HALF_EVEN:
+        for amount, rate, duration, tax in rows:
+            # Resto zero após somar a metade indica empate exato; se o quociente for ímpar, volta para o par
+            profit, remainder = divmod(amount * rate * duration + half, BASIS_POINTS)
+            if not remainder and profit & 1:
+                profit -= 1
+            tax_value, remainder = divmod(profit * tax + half, BASIS_POINTS)
+            if not remainder and tax_value & 1:
+                tax_value -= 1
+            add_profit(profit)
+            add_gross(amount + profit)
+            add_net(amount + profit - tax_value)
+    else:
+        for amount, rate, duration, tax in rows:
+            profit = (amount * rate * duration + offset) // BASIS_POINTS
+            tax_value = (profit * tax + offset) // BASIS_POINTS
+            add_profit(profit)
+            add_gross(amount + profit)
+            add_net(amount + profit - tax_value)
+
+    return gross_value, net_value, profitability
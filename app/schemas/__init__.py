@@ -1,2 +1,2 @@
 # Importando os schemas de cota (cota de investimento)
-from .schemas import CotaCreate, CotaResponse
+from .schemas import CotaCreate, CotaResponse, CotaProfitResponse, CotaSummaryResponse, CotaChangeResponse, CotaChangesResponse, JobCreate, JobResponse, JobResultResponse, PortfolioCreate, PortfolioResponse, PortfolioSummaryResponse, PortfolioRebuildResponse
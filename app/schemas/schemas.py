@@ -1,6 +1,13 @@
 # Importação de módulos necessários
 from pydantic import BaseModel, Field
 from datetime import datetime
+from typing import Dict, List, Literal, Optional
+
+# Limites de entrada: os valores são guardados em centavos e pontos-base (inteiros de 64 bits),
+# e o valor bruto e os totais das carteiras precisam caber nessas colunas
+MAX_AMOUNT = 1_000_000_000
+MAX_INTEREST_RATE = 100
+MAX_DURATION_MONTHS = 1_200
 
 
 # Classe para validação de dados de entrada
@@ -10,9 +17,11 @@ class CotaCreate(BaseModel):
 
     Atributos:
         - name (str): Nome da cota (entre 3 e 50 caracteres).
-        - amount (float): Valor investido (maior que 0).
-        - interest_rate (float): Taxa de juros (maior que 0).
-        - duration_months (int): Duração em meses (maior que 0).
+        - amount (float): Valor investido (de 0,01 a MAX_AMOUNT, em centavos inteiros).
+        - interest_rate (float): Taxa de juros, em % ao mês (de 0,01 a MAX_INTEREST_RATE,
+          com no máximo duas casas decimais, ou seja, pontos-base inteiros).
+        - duration_months (int): Duração em meses (de 1 a MAX_DURATION_MONTHS).
+        - portfolio_id (int): ID da carteira da cota (opcional).
     """
     name: str = Field(
         ...,
@@ -22,18 +31,27 @@ class CotaCreate(BaseModel):
     )
     amount: float = Field(
         ...,
-        gt=0,
-        description="O valor investido deve ser maior que 0."
+        ge=0.01,
+        le=MAX_AMOUNT,
+        multiple_of=0.01,
+        description="O valor investido deve estar entre 0,01 e 1 bilhão, com até 2 casas decimais."
     )
     interest_rate: float = Field(
         ...,
-        gt=0,
-        description="A taxa de juros deve ser maior que 0."
+        ge=0.01,
+        le=MAX_INTEREST_RATE,
+        multiple_of=0.01,
+        description="A taxa de juros deve estar entre 0,01% e 100%, com até 2 casas decimais."
     )
     duration_months: int = Field(
         ...,
         gt=0,
-        description="A duração deve ser maior que 0."
+        le=MAX_DURATION_MONTHS,
+        description="A duração deve estar entre 1 e 1200 meses."
+    )
+    portfolio_id: Optional[int] = Field(
+        None,
+        description="ID da carteira à qual a cota pertence."
     )
 
     model_config = {"from_attributes": True}
@@ -51,6 +69,10 @@ class CotaResponse(CotaCreate):
         - created_at (datetime): Data de criação da cota.
         - tax (float): Imposto fixo (15%).
     """
+    # Sem os limites de entrada, para que cotas gravadas antes deles continuem legíveis
+    amount: float
+    interest_rate: float
+    duration_months: int
     id: int
     created_at: datetime
     tax: float = 0.15
@@ -72,4 +94,181 @@ class CotaProfitResponse(BaseModel):
     cota_id: int
     gross_value: float
     net_value: float
-    profitability: float
\ No newline at end of file
+    profitability: float
+
+
+# Classe para resposta do endpoint /cotas/summary
+class CotaSummaryResponse(BaseModel):
+    """
+    Esquema para resposta dos totais consolidados de todas as cotas.
+
+    Atributos:
+        - count (int): Quantidade de cotas.
+        - total_amount (float): Soma dos valores investidos.
+        - total_gross_value (float): Soma dos valores brutos.
+        - total_net_value (float): Soma dos valores líquidos.
+    """
+    count: int
+    total_amount: float
+    total_gross_value: float
+    total_net_value: float
+
+
+# Classe para um evento do feed de alterações das cotas
+class CotaChangeResponse(BaseModel):
+    """
+    Esquema para um evento de alteração de cota (cota de investimento).
+
+    Atributos:
+        - seq (int): Número de sequência do evento.
+        - cota_id (int): ID da cota alterada.
+        - operation (str): Tipo de alteração ('create', 'update', 'delete' ou 'move', na divisão de shards).
+        - payload (dict): Estado da cota após a alteração (nulo na exclusão).
+        - created_at (datetime): Data do evento.
+    """
+    seq: int
+    cota_id: int
+    operation: str
+    payload: Optional[dict] = None
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+# Classe para resposta do endpoint /cotas/changes
+class CotaChangesResponse(BaseModel):
+    """
+    Esquema para resposta do feed de alterações das cotas.
+
+    Atributos:
+        - changes (list): Eventos posteriores ao número de sequência informado.
+        - last_seq (int): Sequência a ser usada como 'since' na próxima consulta.
+    """
+    changes: List[CotaChangeResponse]
+    last_seq: int
+
+
+# Classe para validação dos dados de criação de um job
+class JobCreate(BaseModel):
+    """
+    Esquema para criação de um job em segundo plano.
+
+    Atributos:
+        - kind (str): 'revaluation' (recalcula os valores das cotas), 'simulation'
+          (simula uma grade de taxas e prazos) ou 'export' (exporta as cotas em CSV).
+        - params (dict): Parâmetros do job; a simulação espera 'interest_rates' e 'durations'.
+    """
+    kind: Literal["revaluation", "simulation", "export"]
+    params: dict = Field(default_factory=dict)
+
+
+# Classe para resposta do estado de um job
+class JobResponse(BaseModel):
+    """
+    Esquema para resposta do estado e do progresso de um job.
+
+    Atributos:
+        - id (int): Identificador do job.
+        - kind (str): Tipo do job.
+        - status (str): Situação atual do job.
+        - progress (float): Fração concluída, entre 0 e 1.
+        - processed (int): Quantidade de cotas processadas.
+        - total (int): Quantidade de cotas a processar.
+        - error (str): Mensagem de erro, em caso de falha.
+        - created_at, started_at, finished_at, expires_at (datetime): Datas do ciclo de vida.
+    """
+    id: int
+    kind: str
+    status: str
+    progress: float
+    processed: int
+    total: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
+
+
+# Classe para resposta do resultado de um job
+class JobResultResponse(BaseModel):
+    """
+    Esquema para resposta do resultado de um job concluído.
+
+    Atributos:
+        - id (int): Identificador do job.
+        - kind (str): Tipo do job.
+        - result (dict): Resultado produzido pelo job.
+    """
+    id: int
+    kind: str
+    result: dict
+
+    model_config = {"from_attributes": True}
+
+
+# Classe para validação dos dados de criação de uma carteira
+class PortfolioCreate(BaseModel):
+    """
+    Esquema para criação de uma carteira de cotas.
+
+    Atributos:
+        - name (str): Nome da carteira (entre 3 e 50 caracteres).
+    """
+    name: str = Field(
+        ...,
+        min_length=3,
+        max_length=50,
+        description="O nome deve ter entre 3 e 50 caracteres."
+    )
+
+
+# Classe para resposta de uma carteira
+class PortfolioResponse(PortfolioCreate):
+    """
+    Esquema para resposta de uma carteira de cotas.
+
+    Atributos:
+        - id (int): Identificador único da carteira.
+        - created_at (datetime): Data de criação da carteira.
+    """
+    id: int
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+
+# Classe para resposta do endpoint /portfolios/{portfolio_id}/summary
+class PortfolioSummaryResponse(BaseModel):
+    """
+    Esquema para resposta dos totais de uma carteira.
+
+    Atributos:
+        - portfolio_id (int): Identificador da carteira.
+        - count (int): Quantidade de cotas.
+        - total_amount (float): Soma dos valores investidos.
+        - total_gross_value (float): Soma dos valores brutos.
+        - total_net_value (float): Soma dos valores líquidos.
+        - average_interest_rate (float): Taxa de juros média ponderada pelo valor investido (%).
+        - maturity_distribution (dict): Valor investido por faixa de prazo.
+    """
+    portfolio_id: int
+    count: int
+    total_amount: float
+    total_gross_value: float
+    total_net_value: float
+    average_interest_rate: float
+    maturity_distribution: Dict[str, float]
+
+
+# Classe para resposta do endpoint /portfolios/rebuild
+class PortfolioRebuildResponse(BaseModel):
+    """
+    Esquema para resposta da reconstrução dos totais das carteiras.
+
+    Atributos:
+        - corrected (list): IDs das carteiras cujos totais divergiam e foram corrigidos.
+    """
+    corrected: List[int]
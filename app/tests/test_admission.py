@@ -0,0 +1,136 @@
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.admission import AdmissionController, AdmissionMiddleware, Rejected, RouteClass, TokenBucket
+from app.main import app as main_app
+
+
+def _controller(**kwargs):
+    options = {"global_limit": 2}
+    options.update(kwargs)
+    return AdmissionController(
+        classes=[
+            RouteClass("read", max_concurrent=2, max_queue=4, queue_timeout=1.0, priority=0),
+            RouteClass("bulk", max_concurrent=2, max_queue=4, queue_timeout=1.0, priority=2, cost=5),
+        ],
+        rules=[(["GET"], r"/read", "read"), (["GET"], r"/bulk", "bulk")],
+        **options
+    )
+
+
+def test_token_bucket():
+    """
+    Testa o balde de fichas: consome o limite de rajada e informa a espera.
+    """
+    bucket = TokenBucket(rate=10, burst=2)
+    assert bucket.take() == 0
+    assert bucket.take() == 0
+    assert 0 < bucket.take() <= 0.1
+
+
+def test_client_quota_rejects_with_429():
+    """
+    Testa a rejeição com 429 quando a cota do cliente se esgota.
+    """
+    controller = _controller(client_rate=1, client_burst=5)
+    bulk = controller.classes["bulk"]
+    controller.check_quota("ip:1", bulk)
+    with pytest.raises(Rejected) as error:
+        controller.check_quota("ip:1", bulk)
+    assert error.value.status_code == 429
+    assert error.value.retry_after >= 1
+    controller.check_quota("ip:2", bulk)
+
+
+def test_reads_are_prioritized_over_bulk():
+    """
+    Testa se, com o limite global ocupado, a leitura na fila é admitida antes do lote.
+    """
+    async def scenario():
+        controller = _controller()
+        read, bulk = controller.classes["read"], controller.classes["bulk"]
+        await controller.acquire(bulk)
+        await controller.acquire(bulk)
+
+        order = []
+
+        async def request(route_class):
+            await controller.acquire(route_class)
+            order.append(route_class.name)
+
+        waiting = [asyncio.create_task(request(bulk)), asyncio.create_task(request(read))]
+        await asyncio.sleep(0)
+        assert controller.snapshot()["queue_depth"] == 2
+
+        controller.release(bulk, 0.1)
+        await asyncio.sleep(0.01)
+        assert order == ["read"]
+        controller.release(bulk, 0.1)
+        await asyncio.gather(*waiting)
+        assert order == ["read", "bulk"]
+
+    asyncio.run(scenario())
+
+
+def test_load_keeps_p99_bounded():
+    """
+    Teste de carga: com 10x mais requisições simultâneas do que a capacidade, as
+    excedentes são rejeitadas rapidamente com 503 e Retry-After, e o p99 da latência
+    fica limitado ao prazo da fila mais o tempo de atendimento.
+    """
+    service_time = 0.05
+    queue_timeout = 0.25
+
+    app = FastAPI()
+
+    @app.get("/read")
+    def slow_read():
+        time.sleep(service_time)
+        return {"ok": True}
+
+    controller = AdmissionController(
+        classes=[RouteClass("read", max_concurrent=4, max_queue=8, queue_timeout=queue_timeout)],
+        rules=[(["GET"], r"/read", "read")],
+        global_limit=4,
+    )
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+
+    async def load():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def timed():
+                started = time.monotonic()
+                response = await client.get("/read")
+                return response, time.monotonic() - started
+
+            results = []
+            for _ in range(5):
+                results += await asyncio.gather(*(timed() for _ in range(40)))
+            return results
+
+    results = asyncio.run(load())
+    latencies = sorted(latency for _, latency in results)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    statuses = [response.status_code for response, _ in results]
+    rejected = [response for response, _ in results if response.status_code == 503]
+
+    assert statuses.count(200) > 0
+    assert rejected and all(int(response.headers["Retry-After"]) >= 1 for response in rejected)
+    assert p99 <= queue_timeout + 3 * service_time + 0.25
+    snapshot = controller.snapshot()
+    assert snapshot["classes"]["read"]["rejected_queue_full"] + snapshot["classes"]["read"]["rejected_timeout"] == len(rejected)
+    assert snapshot["global_in_flight"] == 0 and snapshot["queue_depth"] == 0
+
+
+def test_admission_metrics_endpoint():
+    """
+    Testa a exposição das métricas do controle de admissão na aplicação.
+    """
+    client = TestClient(main_app)
+    client.get("/cotas/")
+    data = client.get("/metrics/admission").json()
+    assert data["queue_depth"] == 0
+    assert data["classes"]["list"]["admitted"] >= 1
@@ -0,0 +1,122 @@
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from app.api.routes import cotas_routes
+from app.crud import crud
+from app.database.database import Base, SessionLocal
+from app.main import app
+from app.models.change_model import CotaChange
+from app.schemas.schemas import CotaCreate
+
+client = TestClient(app)
+
+
+def _last_seq():
+    # Lê o cursor atual direto da tabela; pela API, ele só é informado na resposta 410
+    db = SessionLocal()
+    try:
+        return db.query(func.max(CotaChange.seq)).scalar() or 0
+    finally:
+        db.close()
+
+
+def test_mutations_are_recorded_in_order():
+    """
+    Testa se criação, atualização e exclusão geram eventos ordenados no feed.
+    """
+    since = _last_seq()
+    cota_data = {"name": "Cota Feed", "amount": 1000, "interest_rate": 1, "duration_months": 12}
+    cota_id = client.post("/cotas/", json=cota_data).json()["id"]
+    client.put(f"/cotas/{cota_id}", json={**cota_data, "amount": 1500})
+    client.delete(f"/cotas/{cota_id}")
+
+    response = client.get("/cotas/changes", params={"since": since})
+    assert response.status_code == 200
+    data = response.json()
+    assert [change["operation"] for change in data["changes"]] == ["create", "update", "delete"]
+    assert all(change["cota_id"] == cota_id for change in data["changes"])
+    assert data["changes"][1]["payload"]["amount"] == 1500
+    assert data["changes"][2]["payload"] is None
+    assert data["last_seq"] == data["changes"][-1]["seq"]
+
+
+def test_long_poll_returns_empty_after_wait():
+    """
+    Testa o long-polling sem novos eventos: retorna vazio com a mesma sequência.
+    """
+    since = _last_seq()
+    response = client.get("/cotas/changes", params={"since": since, "wait": 0.1})
+    assert response.status_code == 200
+    assert response.json() == {"changes": [], "last_seq": since}
+
+
+def test_server_sent_events():
+    """
+    Testa o envio dos eventos como Server-Sent Events.
+    """
+    since = _last_seq()
+    cota_data = {"name": "Cota SSE", "amount": 1000, "interest_rate": 1, "duration_months": 12}
+    cota_id = client.post("/cotas/", json=cota_data).json()["id"]
+
+    response = client.get(
+        "/cotas/changes",
+        params={"since": since, "wait": 0.1},
+        headers={"Accept": "text/event-stream"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert "event: create" in response.text
+    assert f'"cota_id":{cota_id}' in response.text
+
+
+def test_compaction_keeps_newest_event(tmp_path, monkeypatch):
+    """
+    Testa a compactação: mantém o evento mais recente e rejeita cursores compactados.
+    A compactação roda em um banco temporário para não invalidar o cursor do banco compartilhado.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'changes.sqlite'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        cota_data = CotaCreate(name="Cota Retenção", amount=1000, interest_rate=1, duration_months=12)
+        crud.create_cota(db, cota_data)
+        crud.create_cota(db, cota_data)
+        newest = db.query(func.max(CotaChange.seq)).scalar()
+
+        assert crud.compact_changes(db, retention_seconds=-60) > 0
+        assert [change.seq for change in crud.list_changes(db, since=newest - 1)] == [newest]
+        with pytest.raises(HTTPException) as error:
+            crud.list_changes(db, since=0)
+        assert error.value.status_code == 410
+
+        # Pela API, a resposta 410 informa de onde continuar após refazer a listagem
+        monkeypatch.setattr(cotas_routes, "SessionLocal", sessionmaker(bind=engine))
+        response = client.get("/cotas/changes", params={"since": 0})
+        assert response.status_code == 410
+        body = response.json()
+        assert (body["last_seq"], body["oldest_seq"]) == (newest, newest)
+        assert "detalhe" in body
+        assert client.get("/cotas/changes", params={"since": body["last_seq"]}).json()["changes"] == []
+    finally:
+        db.close()
+
+
+def test_sequence_comes_from_locked_counter(tmp_path):
+    """
+    Testa a numeração dos eventos pelo contador de sequência, que continua a partir
+    do maior número já gravado.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'changes.sqlite'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        db.add(CotaChange(seq=41, cota_id=1, operation="delete"))
+        db.commit()
+        cota_data = CotaCreate(name="Cota Sequência", amount=1000, interest_rate=1, duration_months=12)
+        cota = crud.create_cota(db, cota_data)
+        crud.update_cota(db, cota.id, cota_data)
+        assert [change.seq for change in crud.list_changes(db, since=41)] == [42, 43]
+    finally:
+        db.close()
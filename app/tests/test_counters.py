@@ -0,0 +1,96 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+from app.crud import crud
+from app.database.database import Base, SessionLocal
+from app.models.counter_model import RowCounter
+from app.schemas.schemas import CotaCreate
+from app.main import app
+
+client = TestClient(app)
+
+
+def _total(**params):
+    response = client.get("/cotas/", params={"limit": 1, **params})
+    assert response.status_code == 200
+    return int(response.headers["X-Total-Count"])
+
+
+def test_counter_follows_create_and_delete():
+    """
+    Testa se o cabeçalho X-Total-Count acompanha as criações e exclusões.
+    """
+    total = _total(count="exact")
+    cota_data = {"name": "Cota Contador", "amount": 1000, "interest_rate": 1, "duration_months": 12}
+    cota_id = client.post("/cotas/", json=cota_data).json()["id"]
+    assert _total(count="exact") == total + 1
+    client.delete(f"/cotas/{cota_id}")
+    assert _total(count="estimated") == total
+    assert "X-Total-Count" not in client.get("/cotas/").headers
+
+
+def test_filtered_counts():
+    """
+    Testa as contagens exata e estimada de uma listagem filtrada.
+    """
+    prefix = "Cota Filtro Contagem"
+    created = [
+        client.post("/cotas/", json={
+            "name": f"{prefix} {i}", "amount": 1000 + i, "interest_rate": 1, "duration_months": 12
+        }).json()["id"]
+        for i in range(3)
+    ]
+    try:
+        assert _total(name=prefix, count="exact") == 3
+        assert _total(name=prefix, min_amount=1001, count="exact") == 2
+        # O valor estimado depende da amostra do banco compartilhado (ver o teste com banco temporário)
+        assert _total(name=prefix, count="estimated") >= 0
+        names = [cota["name"] for cota in client.get("/cotas/", params={"name": prefix}).json()]
+        assert names == [f"{prefix} {i}" for i in range(3)]
+    finally:
+        for cota_id in created:
+            client.delete(f"/cotas/{cota_id}")
+
+
+def test_estimated_count_samples_whole_table(tmp_path, monkeypatch):
+    """
+    Testa a contagem estimada com mais cotas que a amostra: um filtro que só casa com
+    as cotas mais recentes não pode ser estimado como zero.
+    A contagem roda em um banco temporário para não encher o banco compartilhado.
+    """
+    monkeypatch.setattr(crud, "COUNT_SAMPLE_SIZE", 50)
+    engine = create_engine(f"sqlite:///{tmp_path / 'counters.sqlite'}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        for i in range(200):
+            name = "Cota Recente" if i >= 150 else "Cota Antiga"
+            crud.create_cota(db, CotaCreate(name=f"{name} {i}", amount=1000, interest_rate=1, duration_months=12))
+            # Enquanto a amostra cobre todos os IDs, a estimativa é a própria contagem
+            if i == 9:
+                assert crud.count_cotas(db, "estimated", {"name": "Cota Antiga 1"}) == 1
+
+        assert crud.count_cotas(db, "exact", {"name": "Cota Recente"}) == 50
+        assert 40 <= crud.count_cotas(db, "estimated", {"name": "Cota Recente"}) <= 60
+        assert 140 <= crud.count_cotas(db, "estimated", {"name": "Cota Antiga"}) <= 160
+    finally:
+        db.close()
+
+
+def test_reconcile_corrects_drift():
+    """
+    Testa a reconciliação do contador após uma divergência.
+    """
+    db = SessionLocal()
+    try:
+        crud.reconcile_cota_counter(db)
+        total = crud.read_cota_counter(db)
+        db.execute(update(RowCounter).where(RowCounter.name == "cotas").values(value=RowCounter.value + 5))
+        db.commit()
+        assert crud.read_cota_counter(db) == total + 5
+
+        assert crud.reconcile_cota_counter(db) == 5
+        assert crud.read_cota_counter(db) == total
+        assert crud.reconcile_cota_counter(db) == 0
+    finally:
+        db.close()
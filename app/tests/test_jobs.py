@@ -0,0 +1,190 @@
+import time
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from app.crud import crud
+from app.database.database import SessionLocal
+from app.jobs import jobs
+from app.main import app
+from app.models.cota_model import Cota
+from app.schemas.schemas import JobCreate
+
+client = TestClient(app)
+
+
+def _wait_for(job_id, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] not in ("pending", "running"):
+            return job
+        time.sleep(0.2)
+    raise AssertionError(f"O job {job_id} não terminou a tempo.")
+
+
+def test_simulation_job():
+    """
+    Testa a criação, o acompanhamento e o resultado de um job de simulação.
+    """
+    client.post("/cotas/", json={"name": "Cota Job", "amount": 1000, "interest_rate": 1, "duration_months": 12})
+
+    response = client.post("/jobs/", json={
+        "kind": "simulation",
+        "params": {"interest_rates": [1.0, 2.0], "durations": [12]},
+    })
+    assert response.status_code == 202
+    job = _wait_for(response.json()["id"])
+    assert job["status"] == "succeeded"
+    assert job["progress"] == 1.0
+    assert job["processed"] == job["total"]
+
+    result = client.get(f"/jobs/{job['id']}/result").json()["result"]
+    assert [(point["interest_rate"], point["duration_months"]) for point in result["grid"]] == [(1.0, 12), (2.0, 12)]
+    assert result["grid"][1]["total_net_value"] > result["grid"][0]["total_net_value"]
+
+
+def test_export_job():
+    """
+    Testa a exportação das cotas em CSV.
+    """
+    job_id = client.post("/jobs/", json={"kind": "export"}).json()["id"]
+    job = _wait_for(job_id)
+    assert job["status"] == "succeeded"
+
+    result = client.get(f"/jobs/{job_id}/result").json()["result"]
+    lines = result["content"].splitlines()
+    assert lines[0].startswith("id,name,amount")
+    assert len(lines) == job["total"] + 1
+
+
+def test_invalid_job_fails():
+    """
+    Testa um job de simulação sem parâmetros: termina com erro e sem resultado.
+    """
+    job_id = client.post("/jobs/", json={"kind": "simulation"}).json()["id"]
+    job = _wait_for(job_id)
+    assert job["status"] == "failed"
+    assert "interest_rates" in job["error"]
+    assert client.get(f"/jobs/{job_id}/result").status_code == 409
+
+
+def test_cancel_and_expire_jobs():
+    """
+    Testa o cancelamento de um job pendente e a expiração do resultado.
+    """
+    db = SessionLocal()
+    try:
+        pending = crud.create_job(db, JobCreate(kind="export"), max_pending=1000)
+        assert client.post(f"/jobs/{pending.id}/cancel").json()["status"] == "cancelled"
+        assert client.post(f"/jobs/{pending.id}/cancel").status_code == 409
+
+        done = crud.create_job(db, JobCreate(kind="export"), max_pending=1000)
+        done.status = "succeeded"
+        done.result = {"format": "csv", "content": ""}
+        done.expires_at = datetime.utcnow() - timedelta(seconds=1)
+        db.commit()
+        done_id = done.id
+        assert crud.expire_jobs(db) >= 1
+    finally:
+        db.close()
+
+    assert client.get(f"/jobs/{done_id}/result").status_code == 410
+
+
+def test_revaluation_skips_cotas_changed_during_the_job(monkeypatch):
+    """
+    Testa a reavaliação quando uma cota é alterada entre a leitura do lote e a gravação:
+    os valores calculados a partir da leitura antiga não sobrescrevem a alteração.
+    """
+    cota_data = {"name": "Cota Reavaliação", "amount": 1000, "interest_rate": 1, "duration_months": 12}
+    stale_id = client.post("/cotas/", json=cota_data).json()["id"]
+    other_id = client.post("/cotas/", json=cota_data).json()["id"]
+
+    db = SessionLocal()
+    db.expire_on_commit = False
+    try:
+        # Valores gravados desatualizados, para que a reavaliação tenha o que corrigir
+        db.query(Cota).filter(Cota.id.in_([stale_id, other_id])).update(
+            {"gross_value_cents": 1}, synchronize_session=False
+        )
+        db.commit()
+
+        def chunks(db, job, fn, to_row):
+            cotas = db.query(Cota).filter(Cota.id.in_([stale_id, other_id])).order_by(Cota.id).all()
+            values = fn([to_row(cota) for cota in cotas])
+            # Atualização feita por um usuário enquanto o lote está no pool de processos
+            client.put(f"/cotas/{stale_id}", json={**cota_data, "amount": 2000})
+            yield cotas, values
+
+        monkeypatch.setattr(jobs, "_map_chunks", chunks)
+        assert jobs.run_revaluation(db, None) == {"updated": 1, "skipped": 1}
+    finally:
+        db.close()
+
+    db = SessionLocal()
+    try:
+        stale, other = crud.get_cota(db, stale_id), crud.get_cota(db, other_id)
+        assert (stale.amount, stale.gross_value) == (2000, 2240)
+        assert other.gross_value == 1120
+    finally:
+        db.close()
+    client.delete(f"/cotas/{stale_id}")
+    client.delete(f"/cotas/{other_id}")
+
+
+def test_cancel_between_read_and_claim_is_kept(monkeypatch):
+    """
+    Testa um cancelamento gravado logo após a leitura do job pelo executor: o job não
+    pode voltar a 'running' e terminar como concluído.
+    """
+    db = SessionLocal()
+    try:
+        job = crud.create_job(db, JobCreate(kind="export"), max_pending=1000)
+    finally:
+        db.close()
+
+    get_job = crud.get_job
+
+    def get_job_then_cancel(session, job_id):
+        found = get_job(session, job_id)
+        # O cancelamento usa a busca original (cancel_job também chama crud.get_job)
+        monkeypatch.setattr(crud, "get_job", get_job)
+        other = SessionLocal()
+        try:
+            crud.cancel_job(other, job_id)
+        finally:
+            other.close()
+        return found
+
+    monkeypatch.setattr(crud, "get_job", get_job_then_cancel)
+    jobs.run_job(job.id)
+
+    job = client.get(f"/jobs/{job.id}").json()
+    assert job["status"] == "cancelled"
+    assert client.post(f"/jobs/{job['id']}/cancel").status_code == 409
+    # Um segundo worker não executa o job novamente
+    jobs.run_job(job["id"])
+    assert client.get(f"/jobs/{job['id']}").json()["status"] == "cancelled"
+
+
+def test_only_stale_running_jobs_are_failed():
+    """
+    Testa a recuperação: só os jobs em execução sem sinal de vida recente são marcados como falhos.
+    """
+    db = SessionLocal()
+    try:
+        stale = crud.create_job(db, JobCreate(kind="export"), max_pending=1000)
+        alive = crud.create_job(db, JobCreate(kind="export"), max_pending=1000)
+        stale.status = alive.status = "running"
+        stale.heartbeat_at = jobs._now() - timedelta(seconds=jobs.JOBS_HEARTBEAT_TIMEOUT + 60)
+        alive.heartbeat_at = jobs._now()
+        db.commit()
+
+        assert jobs.fail_stale_jobs() >= 1
+        db.expire_all()
+        assert crud.get_job(db, stale.id).status == "failed"
+        assert crud.get_job(db, alive.id).status == "running"
+
+        alive.status = "cancelled"
+        db.commit()
+    finally:
+        db.close()
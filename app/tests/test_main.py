@@ -5,7 +5,11 @@ import os
 
 # Adicionando o caminho do app para os imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../app')))
+from fastapi import HTTPException
+from app.crud import crud
+from app.database.database import SessionLocal
 from app.main import app
+from app.schemas.schemas import CotaCreate
 
 client = TestClient(app)
 
@@ -137,6 +141,35 @@ def test_invalid_cota_creation():
     assert len(data["detalhe"]) > 0  # Verifica se há detalhes sobre os erros
 
 
+def test_invalid_precision_and_bounds():
+    """
+    Testa a rejeição de taxas e valores abaixo de um ponto-base ou centavo, com casas
+    decimais demais ou grandes demais para as colunas inteiras, na criação e na atualização.
+    """
+    valid = {"name": "Cota Limites", "amount": 1000, "interest_rate": 1, "duration_months": 12}
+    cota_id = client.post("/cotas/", json=valid).json()["id"]
+    invalid = [
+        {"interest_rate": 0.001},
+        {"interest_rate": 1.234},
+        {"amount": 1000.005},
+        {"amount": 1e20},
+        {"duration_months": 100_000},
+    ]
+    for change in invalid:
+        assert client.post("/cotas/", json={**valid, **change}).status_code == 422
+        assert client.put(f"/cotas/{cota_id}", json={**valid, **change}).status_code == 422
+
+    # Um erro no cálculo durante a atualização retorna 400, como na criação
+    db = SessionLocal()
+    try:
+        with pytest.raises(HTTPException) as error:
+            crud.update_cota(db, cota_id, CotaCreate.model_construct(**{**valid, "interest_rate": 0.001}))
+        assert error.value.status_code == 400
+    finally:
+        db.close()
+    client.delete(f"/cotas/{cota_id}")
+
+
 def test_get_nonexistent_cota():
     """
     Testa a busca de uma cota inexistente.
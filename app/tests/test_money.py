@@ -0,0 +1,77 @@
+from decimal import Decimal, ROUND_HALF_EVEN, ROUND_HALF_UP
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from app import money
+from app.database.migrations import migrate_cotas_to_fixed_point
+
+
+def test_div_round_matches_decimal():
+    """
+    Testa a divisão inteira arredondada contra o módulo decimal, em todos os modos.
+    """
+    for rounding in money.ROUNDING_MODES:
+        for numerator in range(-30_000, 30_001, 250):
+            expected = int((Decimal(numerator) / 10_000).quantize(Decimal(1), rounding=rounding))
+            assert money.div_round(numerator, 10_000, rounding) == expected
+
+
+def test_values_are_exact_to_the_cent():
+    """
+    Testa o cálculo em centavos: 0,1 + 0,2 não sofre erro de ponto flutuante.
+    """
+    assert money.to_cents(0.1) + money.to_cents(0.2) == money.to_cents(0.3)
+
+    # R$ 1.000,00 a 2% ao mês por 12 meses, com 15% de imposto sobre o rendimento
+    assert money.calculate_cota_values_cents(100_000, 200, 12, 1_500) == (124_000, 120_400, 24_000)
+
+    # Empate exato: R$ 0,005 de imposto arredonda para o par ou para cima, conforme o modo
+    assert money.calculate_cota_values_cents(10, 500, 1, 5_000, ROUND_HALF_EVEN) == (10, 10, 0)
+    assert money.calculate_cota_values_cents(10, 1_000, 1, 5_000, ROUND_HALF_EVEN) == (11, 11, 1)
+    assert money.calculate_cota_values_cents(30, 1_000, 1, 5_000, ROUND_HALF_EVEN) == (33, 31, 3)
+    assert money.calculate_cota_values_cents(30, 1_000, 1, 5_000, ROUND_HALF_UP) == (33, 31, 3)
+
+    with pytest.raises(ValueError):
+        money.calculate_cota_values_cents(0, 100, 12, 1_500)
+
+
+@pytest.mark.parametrize("rounding", money.ROUNDING_MODES)
+def test_batch_matches_scalar(rounding):
+    """
+    Testa se o cálculo em lote produz os mesmos valores do cálculo unitário.
+    """
+    rows = [
+        (amount, rate, duration, tax)
+        for amount in (1, 15, 99_999, 123_456_789)
+        for rate in (1, 25, 150, 999)
+        for duration in (1, 7, 120)
+        for tax in (0, 1_500, 5_000)
+    ]
+    gross_value, net_value, profitability = money.calculate_batch(*zip(*rows), rounding=rounding)
+    for i, row in enumerate(rows):
+        assert (gross_value[i], net_value[i], profitability[i]) == money.calculate_cota_values_cents(*row, rounding)
+
+
+def test_migrate_float_rows(tmp_path):
+    """
+    Testa a migração das colunas em float para centavos e pontos-base.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE cotas (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR NOT NULL, "
+            "amount FLOAT NOT NULL, interest_rate FLOAT NOT NULL, duration_months INTEGER NOT NULL, "
+            "tax FLOAT, gross_value FLOAT, net_value FLOAT, profitability FLOAT, created_at DATETIME)"
+        ))
+        conn.execute(text(
+            "INSERT INTO cotas VALUES (1, 'Cota A', 1500.1, 1.5, 12, 0.15, 1770.118, 1729.62, 270.018, NULL)"
+        ))
+
+    assert migrate_cotas_to_fixed_point(engine) == 1
+    assert migrate_cotas_to_fixed_point(engine) == 0
+
+    columns = {column["name"] for column in inspect(engine).get_columns("cotas")}
+    assert "amount" not in columns
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT * FROM cotas")).one()
+    assert (row.amount_cents, row.interest_rate_bp, row.tax_bp) == (150_010, 150, 1_500)
+    assert (row.gross_value_cents, row.net_value_cents, row.profitability_cents) == (177_012, 172_962, 27_002)
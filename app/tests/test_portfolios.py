@@ -0,0 +1,167 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect, text, update
+from app.crud import crud
+from app.database.migrations import add_cota_portfolio_column
+from app.database.database import SessionLocal
+from app.models.portfolio_model import PortfolioRollup
+from app.main import app
+
+client = TestClient(app)
+
+
+def _create_portfolio(name="Carteira Teste"):
+    response = client.post("/portfolios/", json={"name": name})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def _create_cota(portfolio_id, amount, interest_rate, duration_months):
+    response = client.post("/cotas/", json={
+        "name": "Cota Carteira", "amount": amount, "interest_rate": interest_rate,
+        "duration_months": duration_months, "portfolio_id": portfolio_id,
+    })
+    assert response.status_code == 201
+    return response.json()
+
+
+def _summary(portfolio_id):
+    response = client.get(f"/portfolios/{portfolio_id}/summary")
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_rollups_follow_create_update_and_delete():
+    """
+    Testa os totais da carteira após criação, atualização e exclusão de cotas.
+    """
+    portfolio_id = _create_portfolio()
+    assert _summary(portfolio_id)["count"] == 0
+
+    first = _create_cota(portfolio_id, 1000, 1, 6)
+    second = _create_cota(portfolio_id, 3000, 2, 36)
+    summary = _summary(portfolio_id)
+    assert summary["count"] == 2
+    assert summary["total_amount"] == 4000
+    assert summary["total_gross_value"] == first["amount"] * 1.06 + 3000 * 1.72
+    # (1000 x 1% + 3000 x 2%) / 4000 = 1,75%
+    assert summary["average_interest_rate"] == 1.75
+    assert summary["maturity_distribution"]["up_to_6_months"] == 1000
+    assert summary["maturity_distribution"]["25_to_60_months"] == 3000
+
+    client.put(f"/cotas/{first['id']}", json={
+        "name": "Cota Carteira", "amount": 2000, "interest_rate": 1, "duration_months": 12,
+        "portfolio_id": portfolio_id,
+    })
+    summary = _summary(portfolio_id)
+    assert summary["total_amount"] == 5000
+    assert summary["maturity_distribution"]["up_to_6_months"] == 0
+    assert summary["maturity_distribution"]["7_to_12_months"] == 2000
+
+    client.delete(f"/cotas/{second['id']}")
+    summary = _summary(portfolio_id)
+    assert summary["count"] == 1
+    assert summary["average_interest_rate"] == 1.0
+
+    listed = client.get("/cotas/", params={"portfolio_id": portfolio_id}).json()
+    assert [cota["id"] for cota in listed] == [first["id"]]
+    client.delete(f"/cotas/{first['id']}")
+    assert _summary(portfolio_id)["total_amount"] == 0
+
+
+def test_moving_cota_between_portfolios():
+    """
+    Testa a transferência de uma cota de uma carteira para outra.
+    """
+    source, target = _create_portfolio("Carteira Origem"), _create_portfolio("Carteira Destino")
+    cota = _create_cota(source, 1000, 1, 12)
+    client.put(f"/cotas/{cota['id']}", json={
+        "name": "Cota Carteira", "amount": 1000, "interest_rate": 1, "duration_months": 12,
+        "portfolio_id": target,
+    })
+    assert _summary(source)["count"] == 0
+    assert _summary(target)["count"] == 1
+
+    # Sem o campo, a cota continua na carteira; com null, sai dela
+    cota_data = {"name": "Cota Carteira", "amount": 2000, "interest_rate": 1, "duration_months": 12}
+    assert client.put(f"/cotas/{cota['id']}", json=cota_data).json()["portfolio_id"] == target
+    assert _summary(target)["total_amount"] == 2000
+    client.put(f"/cotas/{cota['id']}", json={**cota_data, "portfolio_id": None})
+    assert _summary(target)["count"] == 0
+    client.delete(f"/cotas/{cota['id']}")
+
+
+def test_unknown_portfolio():
+    """
+    Testa a criação de cota com carteira inexistente e o resumo de carteira inexistente.
+    """
+    response = client.post("/cotas/", json={
+        "name": "Cota Carteira", "amount": 1000, "interest_rate": 1, "duration_months": 12,
+        "portfolio_id": 999_999_999,
+    })
+    assert response.status_code == 400
+    assert client.get("/portfolios/999999999/summary").status_code == 404
+
+
+def test_rebuild_corrects_rollups():
+    """
+    Testa se a reconstrução completa detecta e corrige totais divergentes.
+    """
+    portfolio_id = _create_portfolio()
+    cota = _create_cota(portfolio_id, 1500, 1.5, 24)
+    assert client.post("/portfolios/rebuild").json()["corrected"] == []
+
+    db = SessionLocal()
+    try:
+        db.execute(
+            update(PortfolioRollup)
+            .where(PortfolioRollup.portfolio_id == portfolio_id)
+            .values(amount_cents=1, cota_count=7)
+        )
+        db.commit()
+        assert crud.summarize_portfolio(db, portfolio_id)["count"] == 7
+    finally:
+        db.close()
+
+    response = client.post("/portfolios/rebuild", params={"portfolio_id": portfolio_id})
+    assert response.json()["corrected"] == [portfolio_id]
+    summary = _summary(portfolio_id)
+    assert (summary["count"], summary["total_amount"]) == (1, 1500)
+    client.delete(f"/cotas/{cota['id']}")
+
+
+def test_add_portfolio_column(tmp_path):
+    """
+    Testa a migração que adiciona a carteira às cotas de um banco existente.
+    """
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.sqlite'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE cotas (id INTEGER NOT NULL PRIMARY KEY, name VARCHAR NOT NULL)"))
+
+    assert add_cota_portfolio_column(engine) is True
+    assert add_cota_portfolio_column(engine) is False
+    assert "portfolio_id" in {column["name"] for column in inspect(engine).get_columns("cotas")}
+
+
+def test_rollups_use_current_row_not_stale_session_copy():
+    """
+    Testa se a exclusão aplica o delta à carteira atual da cota, mesmo quando a
+    sessão guarda uma leitura antiga feita antes de outra sessão mover a cota.
+    """
+    source, target = _create_portfolio("Carteira Antiga"), _create_portfolio("Carteira Nova")
+    cota = _create_cota(source, 1000, 1, 12)
+
+    db = SessionLocal()
+    try:
+        # Mantém a referência para que a leitura antiga continue no mapa de identidade da sessão
+        stale = crud.get_cota(db, cota["id"])
+        assert stale.portfolio_id == source
+        client.put(f"/cotas/{cota['id']}", json={
+            "name": "Cota Carteira", "amount": 1000, "interest_rate": 1, "duration_months": 12,
+            "portfolio_id": target,
+        })
+        crud.delete_cota(db, cota["id"])
+    finally:
+        db.close()
+
+    assert _summary(source)["count"] == 0
+    assert _summary(target)["count"] == 0
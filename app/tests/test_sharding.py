@@ -0,0 +1,291 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.orm import sessionmaker
+from app.crud import crud
+from app.database import rebalance
+from app.database.database import Base
+from app.database.rebalance import redistribute, split_shard
+from app.database.sharding import ShardRouter, make_engine
+from app.models.cota_model import Cota
+from app.schemas.schemas import CotaCreate, JobCreate, PortfolioCreate
+
+
+@pytest.fixture
+def router(tmp_path):
+    """
+    Cria um roteador com 3 shards em arquivos SQLite locais.
+    """
+    urls = [f"sqlite:///{tmp_path / f'shard{i}.sqlite'}" for i in range(3)]
+    router = ShardRouter(urls)
+    router.create_all(Base.metadata, id_table=Cota.__table__)
+    return router
+
+
+def _create_cotas(router, total):
+    db = router.session()
+    try:
+        return [
+            crud.create_cota(db, CotaCreate(
+                name=f"Cota {i}", amount=1000 + i, interest_rate=1.0, duration_months=12
+            )).id
+            for i in range(total)
+        ]
+    finally:
+        db.close()
+
+
+def _count_per_shard(router):
+    return [
+        len(rows) for rows in router.fan_out(lambda conn: conn.execute(Cota.__table__.select()).all())
+    ]
+
+
+def test_cotas_are_spread_across_shards(router):
+    """
+    Testa se as cotas recebem IDs únicos e são distribuídas entre os shards.
+    """
+    ids = _create_cotas(router, 30)
+    assert len(set(ids)) == 30
+    assert _count_per_shard(router) == [10, 10, 10]
+
+
+def test_point_operations_go_to_owning_shard(router):
+    """
+    Testa busca, atualização e exclusão de cotas no shard correto.
+    """
+    ids = _create_cotas(router, 6)
+    db = router.session()
+    try:
+        cota = crud.get_cota(db, ids[4])
+        assert cota.name == "Cota 4"
+
+        updated = crud.update_cota(db, ids[4], CotaCreate(
+            name="Cota Atualizada", amount=5000, interest_rate=2.0, duration_months=6
+        ))
+        assert updated.amount == 5000
+
+        crud.delete_cota(db, ids[5])
+        assert crud.get_cota(db, ids[5]) is None
+    finally:
+        db.close()
+
+    db = router.session()
+    try:
+        assert crud.get_cota(db, ids[4]).name == "Cota Atualizada"
+    finally:
+        db.close()
+
+
+def test_list_and_summary_merge_all_shards(router):
+    """
+    Testa a listagem paginada e os totais consolidados entre os shards.
+    """
+    ids = _create_cotas(router, 12)
+    db = router.session()
+    try:
+        page = crud.list_cotas(db, skip=3, limit=5)
+        assert [cota.id for cota in page] == sorted(ids)[3:8]
+
+        summary = crud.summarize_cotas(db)
+        assert summary["count"] == 12
+        assert crud.count_cotas(db) == 12
+        assert crud.count_cotas(db, filters={"min_amount": 1006}) == 6
+        assert summary["total_amount"] == sum(1000 + i for i in range(12))
+    finally:
+        db.close()
+
+
+def test_split_shard_moves_rows(router, tmp_path):
+    """
+    Testa a divisão de um shard em dois, preservando todas as cotas.
+    """
+    ids = _create_cotas(router, 30)
+    result = split_shard(
+        router, "0", f"sqlite:///{tmp_path / 'shard3.sqlite'}",
+        Cota.__table__, Base.metadata, batch_size=4, grace_seconds=0, fence=crud.record_moves
+    )
+    assert result["target"] == "3"
+    assert result["rows"] > 0
+    assert sum(_count_per_shard(router)) == 30
+
+    db = router.session()
+    try:
+        # As cotas movidas ainda são contadas no shard de origem até a reconciliação
+        assert crud.reconcile_cota_counter(db) == 2 * result["rows"]
+        assert crud.count_cotas(db) == 30
+        assert [cota.id for cota in crud.list_cotas(db, limit=100)] == sorted(ids)
+        for cota_id in ids:
+            assert crud.get_cota(db, cota_id).id == cota_id
+
+        # O feed da origem marca onde os eventos das cotas movidas passam a ser gravados
+        moves = [change for change in crud.list_changes(db, limit=1000, shard="0") if change.operation == "move"]
+        assert len(moves) == result["rows"]
+        assert all(router.shard_for_id(change.cota_id) == "3" for change in moves)
+        assert moves[0].payload == {"shard": "3"}
+        with pytest.raises(HTTPException) as error:
+            crud.list_changes(db)
+        assert error.value.status_code == 400
+    finally:
+        db.close()
+
+
+def test_split_shard_keeps_writes_made_after_the_flip(router, tmp_path, monkeypatch):
+    """
+    Testa a divisão com escritas intercaladas: um roteador desatualizado escreve na
+    origem e, após a troca do mapa, uma escrita mais nova chega ao destino.
+    """
+    ids = _create_cotas(router, 30)
+    # Roteador de outro processo que ainda não recarregou o mapa de buckets
+    stale = ShardRouter([str(router.catalog.url)])
+    stale._refresh_if_stale = lambda: None
+
+    def write(session_router, cota_id, name, amount):
+        db = session_router.session()
+        try:
+            crud.update_cota(db, cota_id, CotaCreate(
+                name=name, amount=amount, interest_rate=1.0, duration_months=12
+            ))
+        finally:
+            db.close()
+
+    def interleave(seconds):
+        moved = [cota_id for cota_id in ids if router.shard_for_id(cota_id) != stale.shard_for_id(cota_id)]
+        write(stale, moved[0], "stale-write", 1000)
+        write(router, moved[0], "fresh-write", 2000)
+        write(stale, moved[1], "stale-only", 3000)
+        interleave.moved = moved
+
+    monkeypatch.setattr(rebalance.time, "sleep", interleave)
+    split_shard(
+        router, "0", f"sqlite:///{tmp_path / 'shard3.sqlite'}",
+        Cota.__table__, Base.metadata, batch_size=4, grace_seconds=0
+    )
+
+    db = router.session()
+    try:
+        fresh = crud.get_cota(db, interleave.moved[0])
+        assert (fresh.name, fresh.amount) == ("fresh-write", 2000)
+        stale_only = crud.get_cota(db, interleave.moved[1])
+        assert (stale_only.name, stale_only.amount) == ("stale-only", 3000)
+        assert sum(_count_per_shard(router)) == 30
+    finally:
+        db.close()
+
+
+def test_portfolio_rollups_across_shards(router):
+    """
+    Testa os totais de uma carteira cujas cotas estão espalhadas entre os shards.
+    """
+    db = router.session()
+    try:
+        portfolio = crud.create_portfolio(db, PortfolioCreate(name="Carteira Shards"))
+        ids = [
+            crud.create_cota(db, CotaCreate(
+                name=f"Cota {i}", amount=1000, interest_rate=1.0, duration_months=12,
+                portfolio_id=portfolio.id
+            )).id
+            for i in range(6)
+        ]
+        crud.delete_cota(db, ids[0])
+
+        summary = crud.summarize_portfolio(db, portfolio.id)
+        assert (summary["count"], summary["total_amount"]) == (5, 5000)
+        assert summary["maturity_distribution"]["7_to_12_months"] == 5000
+        assert crud.rebuild_portfolio_rollups(db) == []
+    finally:
+        db.close()
+
+
+def test_portfolios_are_found_after_split(router, tmp_path):
+    """
+    Testa se as carteiras, guardadas no shard do catálogo, continuam acessíveis após a divisão.
+    """
+    db = router.session()
+    try:
+        portfolios = [crud.create_portfolio(db, PortfolioCreate(name=f"Carteira {i}")).id for i in range(4)]
+    finally:
+        db.close()
+    # Pelo bucket do ID, parte das carteiras pertenceria a outros shards
+    assert [router.shard_for_id(portfolio_id) for portfolio_id in portfolios].count("0") < 4
+
+    split_shard(
+        router, "0", f"sqlite:///{tmp_path / 'shard3.sqlite'}",
+        Cota.__table__, Base.metadata, batch_size=4, grace_seconds=0
+    )
+
+    db = router.session()
+    try:
+        for portfolio_id in portfolios:
+            assert crud.get_portfolio(db, portfolio_id).id == portfolio_id
+            assert crud.summarize_portfolio(db, portfolio_id)["count"] == 0
+        cota = crud.create_cota(db, CotaCreate(
+            name="Cota Carteira", amount=1000, interest_rate=1.0, duration_months=12,
+            portfolio_id=portfolios[2]
+        ))
+        assert crud.summarize_portfolio(db, portfolios[2])["total_amount"] == 1000
+        assert router.shard_for_id(cota.id) in router.active_shards()
+    finally:
+        db.close()
+
+
+def test_jobs_are_found_after_split(router, tmp_path):
+    """
+    Testa se um job pendente, guardado no shard do catálogo, continua acessível após a divisão.
+    """
+    _create_cotas(router, 6)
+    db = router.session()
+    try:
+        jobs = [crud.create_job(db, JobCreate(kind="export"), max_pending=10).id for _ in range(4)]
+    finally:
+        db.close()
+
+    split_shard(
+        router, "0", f"sqlite:///{tmp_path / 'shard3.sqlite'}",
+        Cota.__table__, Base.metadata, batch_size=4, grace_seconds=0
+    )
+
+    db = router.session()
+    try:
+        for job_id in jobs:
+            assert crud.get_job(db, job_id).status == "pending"
+        assert crud.cancel_job(db, jobs[0]).status == "cancelled"
+    finally:
+        db.close()
+
+
+def test_single_database_becomes_first_shard(tmp_path):
+    """
+    Testa a migração de um banco único: as cotas existentes vão para o shard dono do
+    seu bucket e os novos IDs não repetem os já usados.
+    """
+    url = f"sqlite:///{tmp_path / 'shard0.sqlite'}"
+    engine = make_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        ids = [
+            crud.create_cota(db, CotaCreate(
+                name=f"Cota {i}", amount=1000, interest_rate=1.0, duration_months=12
+            )).id
+            for i in range(4)
+        ]
+    finally:
+        db.close()
+
+    router = ShardRouter([url, f"sqlite:///{tmp_path / 'shard1.sqlite'}"])
+    router.create_all(Base.metadata, id_table=Cota.__table__)
+    assert redistribute(router, Cota.__table__, fence=crud.record_moves) == 2
+    assert redistribute(router, Cota.__table__) == 0
+    assert _count_per_shard(router) == [2, 2]
+
+    db = router.session()
+    try:
+        crud.reconcile_cota_counter(db)
+        assert [crud.get_cota(db, cota_id) is not None for cota_id in ids] == [True] * 4
+        assert [cota.id for cota in crud.list_cotas(db)] == ids
+        assert crud.count_cotas(db) == 4
+        moves = [change for change in crud.list_changes(db, shard="0") if change.operation == "move"]
+        assert sorted(change.cota_id for change in moves) == [cota_id for cota_id in ids if cota_id % 2]
+        assert _create_cotas(router, 1)[0] > max(ids)
+    finally:
+        db.close()